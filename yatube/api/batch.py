@@ -0,0 +1,172 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from core.utils import chunked
+from posts import bulk
+from posts.forms import CommentForm, PostForm
+from posts.models import Group, Post
+
+User = get_user_model()
+
+KINDS = ('post', 'comment', 'follow')
+
+
+class BatchResult:
+    """Сколько объектов создано и ошибки по номерам строк."""
+
+    def __init__(self):
+        self.created = dict.fromkeys(KINDS, 0)
+        self.errors = []
+
+    def fail(self, line, errors):
+        self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'errors': self.errors}
+
+
+def parse(lines, result):
+    """Номера и объекты строк NDJSON; пустые строки пропускаются."""
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            result.fail(number, {'__all__': ['Строка не является JSON']})
+            continue
+        if not isinstance(record, dict) or record.get('type') not in KINDS:
+            result.fail(number, {
+                'type': [f'Ожидается объект с type из {", ".join(KINDS)}']
+            })
+            continue
+        yield number, record
+
+
+def form_errors(form):
+    return {field: list(errors) for field, errors in form.errors.items()}
+
+
+def valid_posts(records, result):
+    """Посты, прошедшие PostForm; группа задается slug'ом.
+
+    Группы пачки ищутся одним запросом, а не выбором в форме
+    по запросу на строку.
+    """
+    slugs = {
+        record.get('group') for _, record in records
+        if isinstance(record.get('group'), str)
+    }
+    groups = Group.objects.in_bulk(slugs, field_name='slug')
+    valid = []
+    for number, record in records:
+        form = PostForm(data={'text': record.get('text', '')})
+        del form.fields['group']
+        errors = {} if form.is_valid() else form_errors(form)
+        slug = record.get('group')
+        if slug and groups.get(slug) is None:
+            errors['group'] = ['Группа не найдена']
+        if errors:
+            result.fail(number, errors)
+            continue
+        post = form.save(commit=False)
+        post.group = groups.get(slug)
+        valid.append((number, post))
+    return valid
+
+
+def valid_comments(records, result):
+    """Комментарии, прошедшие CommentForm, к существующим постам."""
+    post_ids = {
+        record.get('post') for _, record in records
+        if isinstance(record.get('post'), int)
+        and not isinstance(record.get('post'), bool)
+    }
+    posts = Post.objects.only('pk', 'author_id', 'group_id').in_bulk(
+        post_ids
+    )
+    valid = []
+    for number, record in records:
+        form = CommentForm(data={'text': record.get('text', '')})
+        errors = {} if form.is_valid() else form_errors(form)
+        post = posts.get(record.get('post'))
+        if post is None:
+            errors['post'] = ['Пост не найден']
+        if errors:
+            result.fail(number, errors)
+            continue
+        comment = form.save(commit=False)
+        comment.post = post
+        valid.append((number, comment))
+    return valid
+
+
+def valid_follows(user, records, result):
+    """Авторы для подписки; повторная подписка ошибкой не считается."""
+    names = {
+        record.get('author') for _, record in records
+        if isinstance(record.get('author'), str)
+    }
+    authors = User.objects.in_bulk(names, field_name='username')
+    valid = []
+    for number, record in records:
+        author = authors.get(record.get('author'))
+        if author is None:
+            result.fail(number, {'author': ['Автор не найден']})
+        elif author == user:
+            result.fail(number, {'author': ['Нельзя подписаться на себя']})
+        else:
+            valid.append((number, author))
+    return valid
+
+
+def write_chunk(user, rows, result):
+    """Проверяет и записывает пачку строк одной транзакцией."""
+    records = {kind: [] for kind in KINDS}
+    for number, record in rows:
+        records[record['type']].append((number, record))
+    written = []
+    try:
+        with transaction.atomic():
+            posts = valid_posts(records['post'], result)
+            comments = valid_comments(records['comment'], result)
+            authors = valid_follows(user, records['follow'], result)
+            written = [number for number, _ in posts + comments + authors]
+            created = {
+                'post': bulk.create_posts(user, [p for _, p in posts]),
+                'comment': bulk.create_comments(
+                    user, [c for _, c in comments]
+                ),
+                'follow': bulk.create_follows(user, [a for _, a in authors]),
+            }
+    except IntegrityError as exc:
+        # Пачка откатилась целиком, остальные пачки пишутся дальше
+        for number in written:
+            result.fail(number, {'__all__': [f'Не записано: {exc}']})
+        return
+    for kind, objects in created.items():
+        result.created[kind] += len(objects)
+
+
+def write_batch(user, lines, batch_size=None):
+    """Создает посты, комментарии и подписки user из строк NDJSON.
+
+    Строка — объект с полем type:
+    {"type": "post", "text": "...", "group": "slug"},
+    {"type": "comment", "post": 1, "text": "..."} или
+    {"type": "follow", "author": "username"}.
+    Строки проверяются как в PostForm и CommentForm и пишутся
+    bulk_create по batch_size в транзакции; ошибочные строки попадают
+    в отчет и не мешают остальным.
+    """
+    result = BatchResult()
+    batch_size = batch_size or settings.API_BATCH_SIZE
+    for rows in chunked(parse(lines, result), batch_size):
+        write_chunk(user, rows, result)
+    result.errors.sort(key=lambda error: error['line'])
+    return result
@@ -0,0 +1,103 @@
+import json
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, modify_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+ROWS = 2000
+# Постов на странице HTML-ленты (posts.views.AMOUNT)
+HTML_PAGE = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает выгрузку постов через JSON API и через HTML-ленту: '
+        'строк в секунду и пик памяти'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=ROWS,
+            help='Сколько постов выгрузить каждым способом',
+        )
+
+    def html(self, client, rows):
+        url = reverse('posts:main_page')
+        fetched = 0
+        for page in range(1, rows // HTML_PAGE + 1):
+            response = client.get(url, {'page': page})
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{url}?page={page}: {response.status_code}'
+                )
+            fetched += HTML_PAGE
+        return fetched
+
+    def api(self, client, rows, page_size, fields='id,text,pub_date,author'):
+        """Читает ответы по кускам, не собирая тело целиком.
+
+        Куски потока состоят из целых строк, поэтому строки считаются
+        по началу объекта, а курсор берется из последнего куска.
+        """
+        url = reverse('api:post_list')
+        fetched, cursor = 0, None
+        while fetched < rows:
+            params = {
+                'limit': min(page_size, rows - fetched),
+                'fields': fields,
+            }
+            if cursor:
+                params['cursor'] = cursor
+            response = client.get(url, params)
+            for chunk in response.streaming_content:
+                fetched += chunk.count(b'{"id": ')
+            cursor = json.loads('{' + chunk.decode()[2:])['next']
+            if cursor is None:
+                break
+        return fetched
+
+    def measure(self, name, func, *args):
+        cache.clear()
+        tracemalloc.start()
+        started = time.perf_counter()
+        fetched = func(*args)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{name:<28}{fetched:>8}{fetched / elapsed:>12.0f}'
+            f'{peak / 2 ** 20:>12.1f}'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        if Post.objects.count() < rows:
+            raise CommandError(
+                f'Нужно хотя бы {rows} постов: заполните базу manage.py seed'
+            )
+        client = Client()
+        self.stdout.write(
+            f'{"способ":<28}{"строк":>8}{"строк/с":>12}{"пик, МиБ":>12}'
+        )
+        with modify_settings(
+            ALLOWED_HOSTS={'append': 'testserver'},
+            MIDDLEWARE={'remove': 'core.middleware.QueryCountMiddleware'},
+        ):
+            self.measure('HTML, по 10', self.html, client, rows)
+            self.measure(
+                f'API, по {settings.API_PAGE_SIZE}',
+                self.api, client, rows, settings.API_PAGE_SIZE,
+            )
+            self.measure('API, одним потоком', self.api, client, rows, rows)
+            self.measure(
+                'API, только id и pub_date', self.api, client, rows, rows,
+                'id,pub_date',
+            )
@@ -0,0 +1,62 @@
+import json
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.batch import write_batch
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает посты, комментарии и подписки пользователя из файла '
+        'NDJSON так же, как POST /api/v1/batch/'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON, "-" — stdin')
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='От чьего имени создаются записи',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.API_BATCH_SIZE,
+            help='Строк в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f'Нет пользователя {options["user"]}')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+
+        started = time.monotonic()
+        if options['path'] == '-':
+            result = write_batch(user, sys.stdin, options['batch_size'])
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                result = write_batch(user, lines, options['batch_size'])
+        elapsed = time.monotonic() - started
+
+        for error in result.errors:
+            self.stderr.write(
+                f'строка {error["line"]}: '
+                + json.dumps(error['errors'], ensure_ascii=False)
+            )
+        total = sum(result.created.values())
+        created = ', '.join(
+            f'{kind}: {count}' for kind, count in result.created.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {created} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} в секунду), '
+            f'ошибок: {len(result.errors)}'
+        ))
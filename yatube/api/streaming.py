@@ -0,0 +1,132 @@
+import json
+from collections import namedtuple
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+from core import replica
+from posts.common import NEXT, decode_cursor, encode_cursor
+
+Position = namedtuple('Position', ('pub_date', 'pk'))
+
+
+class BadRequest(Exception):
+    pass
+
+
+def parse_fields(request, fields):
+    """Запрошенные поля (?fields=id,text) или все поля ресурса."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(fields)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(fields))
+    if unknown or not names:
+        raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def parse_limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('limit должен быть числом')
+    if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+        raise BadRequest(
+            f'limit должен быть от 1 до {settings.API_MAX_PAGE_SIZE}'
+        )
+    return limit
+
+
+class DateKeyset:
+    """Порядок от новых к старым по (pub_date, id), курсор как в HTML."""
+
+    keys = ('pub_date', 'pk')
+
+    def seek(self, queryset, cursor):
+        if cursor:
+            position = decode_cursor(cursor)
+            if position is None or position[0] != NEXT:
+                raise BadRequest('Некорректный курсор')
+            _, date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=date) | Q(pub_date=date, pk__lt=pk)
+            )
+        return queryset.order_by('-pub_date', '-pk')
+
+    def cursor(self, row):
+        return encode_cursor(NEXT, Position(row['pub_date'], row['pk']))
+
+
+class IdKeyset:
+    """Порядок по возрастанию id, курсор — id последней строки."""
+
+    keys = ('pk',)
+
+    def seek(self, queryset, cursor):
+        if cursor:
+            try:
+                queryset = queryset.filter(pk__gt=int(cursor))
+            except ValueError:
+                raise BadRequest('Некорректный курсор')
+        return queryset.order_by('pk')
+
+    def cursor(self, row):
+        return str(row['pk'])
+
+
+def stream(request, queryset, fields, keyset, transforms=None):
+    """Отдает страницу queryset потоком JSON.
+
+    fields — {имя в ответе: путь для values()}. Из базы читаются
+    только запрошенные колонки и ключи пагинации, строки идут через
+    iterator() пачками по API_CHUNK_SIZE и сразу уходят клиенту.
+    Ответ: {"results": [...], "next": курсор следующей страницы}.
+    """
+    names = parse_fields(request, fields)
+    limit = parse_limit(request)
+    transforms = transforms or {}
+    columns = {fields[name] for name in names} | set(keyset.keys)
+    rows = keyset.seek(queryset, request.GET.get('cursor')).values(
+        *columns
+    )[:limit + 1]
+    # Поток читается после выхода из вьюхи: контекст реплики
+    # нужно восстановить на время чтения
+    context = (
+        replica.reading_from_replica if replica.is_reading() else nullcontext
+    )
+
+    def render(row):
+        item = {}
+        for name in names:
+            value = row[fields[name]]
+            if name in transforms:
+                value = transforms[name](value)
+            item[name] = value
+        return json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+    def chunks():
+        with context():
+            yield '{"results": ['
+            buffer, sent, last, more = [], 0, None, False
+            for row in rows.iterator(chunk_size=settings.API_CHUNK_SIZE):
+                if sent == limit:
+                    more = True
+                    break
+                buffer.append(render(row))
+                sent += 1
+                last = row
+                if len(buffer) == settings.API_CHUNK_SIZE:
+                    yield ('' if sent == len(buffer) else ',') + ','.join(
+                        buffer
+                    )
+                    buffer = []
+            if buffer:
+                yield ('' if sent == len(buffer) else ',') + ','.join(buffer)
+            next_cursor = keyset.cursor(last) if more else None
+            yield f'], "next": {json.dumps(next_cursor)}}}'
+
+    return StreamingHttpResponse(chunks(), content_type='application/json')
@@ -0,0 +1,123 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+POSTS = 7
+
+
+def read(response):
+    return json.loads(b''.join(response.streaming_content))
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group,
+            )
+            for i in range(POSTS)
+        ]
+        Comment.objects.create(
+            text='Комментарий', author=cls.reader, post=cls.posts[0],
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    @override_settings(API_CHUNK_SIZE=2)
+    def test_cursor_walks_all_posts(self):
+        """Курсор проходит ленту без пропусков и повторов."""
+        url = reverse('api:post_list')
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get(url, params)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            data = read(response)
+            seen += [post['id'] for post in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_sparse_fields_load_only_requested_columns(self):
+        """?fields= сужает и ответ, и SELECT."""
+        with CaptureQueriesContext(connection) as queries:
+            data = read(self.client.get(
+                reverse('api:post_list'), {'fields': 'id,author'}
+            ))
+        self.assertEqual(set(data['results'][0]), {'id', 'author'})
+        self.assertEqual(data['results'][0]['author'], 'author')
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"posts_post"."text"', sql)
+
+    def test_image_size_fields(self):
+        """Размеры картинки отдаются вместе с постом."""
+        data = read(self.client.get(
+            reverse('api:post_list'),
+            {'fields': 'id,image_width,image_height'},
+        ))
+        self.assertEqual(
+            set(data['results'][0]), {'id', 'image_width', 'image_height'}
+        )
+
+    def test_resources(self):
+        """Группы, профиль, комментарии и посты группы и автора."""
+        groups = read(self.client.get(reverse('api:group_list')))
+        self.assertEqual(groups['results'][0]['slug'], 'group')
+        for url in (
+            reverse('api:group_posts', kwargs={'slug': 'group'}),
+            reverse('api:profile_posts', kwargs={'username': 'author'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(len(read(self.client.get(url))['results']),
+                                 POSTS)
+        comments = read(self.client.get(reverse(
+            'api:post_comments', kwargs={'post_id': self.posts[0].pk}
+        )))
+        self.assertEqual(comments['results'][0]['author'], 'reader')
+        profile = self.client.get(
+            reverse('api:profile', kwargs={'username': 'author'})
+        ).json()
+        self.assertEqual(profile['posts_count'], POSTS)
+        self.assertEqual(profile['followers_count'], 1)
+
+    def test_follow_feed_requires_login(self):
+        """Лента подписок доступна только авторизованному."""
+        url = reverse('api:follow_feed')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        self.assertEqual(len(read(self.client.get(url))['results']), POSTS)
+
+    def test_bad_requests(self):
+        """Неизвестные поля, курсор и limit дают 400, чужой метод — 405."""
+        url = reverse('api:post_list')
+        for params in (
+            {'fields': 'id,password'},
+            {'cursor': 'мусор'},
+            {'limit': 0},
+            {'limit': 'много'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('detail', response.json())
+        self.assertEqual(self.client.post(url).status_code, 405)
+        self.assertEqual(self.client.get(reverse(
+            'api:group_posts', kwargs={'slug': 'missing'}
+        )).status_code, 404)
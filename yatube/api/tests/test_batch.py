@@ -0,0 +1,165 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import commit_callbacks
+from posts import bulk, counts, fragments, search, stats
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+def ndjson(*records):
+    return '\n'.join(
+        record if isinstance(record, str) else json.dumps(record)
+        for record in records
+    )
+
+
+class BatchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='importer')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Старый пост', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def send(self, body):
+        return self.client.post(
+            reverse('api:batch'), body, content_type='application/x-ndjson'
+        )
+
+    def test_batch_creates_objects_and_reports_errors(self):
+        """Верные строки записываются, ошибочные — в отчете по номерам."""
+        response = self.send(ndjson(
+            {'type': 'post', 'text': 'Импорт', 'group': 'group'},
+            {'type': 'post', 'text': ''},
+            'не json',
+            '',
+            {'type': 'comment', 'post': self.post.pk, 'text': 'Ответ'},
+            {'type': 'comment', 'post': 0, 'text': 'Никуда'},
+            {'type': 'follow', 'author': 'author'},
+            {'type': 'follow', 'author': 'importer'},
+            {'type': 'like'},
+        ))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            data['created'], {'post': 1, 'comment': 1, 'follow': 1}
+        )
+        self.assertEqual(
+            [error['line'] for error in data['errors']], [2, 3, 6, 8, 9]
+        )
+        self.assertIn('text', data['errors'][0]['errors'])
+        post = Post.objects.get(text='Импорт')
+        self.assertEqual((post.author, post.group), (self.user, self.group))
+        self.assertTrue(Comment.objects.filter(
+            post=self.post, author=self.user, text='Ответ'
+        ).exists())
+        self.assertTrue(Follow.objects.filter(
+            user=self.user, author=self.author
+        ).exists())
+
+    def test_derived_data_matches_signals(self):
+        """Счетчики и поиск обновлены, как при записи по одной."""
+        stats.user_stats(self.user.pk)
+        stats.user_stats(self.author.pk)
+        self.send(ndjson(
+            *({'type': 'post', 'text': f'Слон {i}', 'group': 'group'}
+              for i in range(3)),
+            {'type': 'comment', 'post': self.post.pk, 'text': 'Ответ'},
+            {'type': 'follow', 'author': 'author'},
+            {'type': 'follow', 'author': 'author'},
+        ))
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(stats.rebuild(
+            UserStats, stats.USER_COUNTERS,
+            [self.user.pk, self.author.pk], verify=True,
+        ), 0)
+        self.assertEqual(search.SearchResults('слон').count(), 3)
+
+    def test_rolled_back_chunk_keeps_caches(self):
+        """Откаченная пачка не сдвигает счетчики и версии лент."""
+        cache.clear()
+        feeds = [counts.ALL_FEED, counts.group_feed(self.group.pk)]
+        counts.get_feed_count(feeds[0], Post.objects.all())
+        counts.get_feed_count(feeds[1], Post.objects.filter(group=self.group))
+        before = fragments.versions(feeds)
+        with mock.patch.object(
+            bulk, 'create_follows', side_effect=IntegrityError('сбой')
+        ), commit_callbacks():
+            response = self.send(ndjson(
+                {'type': 'post', 'text': 'Импорт', 'group': 'group'},
+                {'type': 'follow', 'author': 'author'},
+            ))
+        self.assertEqual(
+            [error['line'] for error in response.json()['errors']], [1, 2]
+        )
+        self.assertFalse(Post.objects.filter(text='Импорт').exists())
+        self.assertEqual(
+            counts.get_feed_count(feeds[0], Post.objects.all()), 1
+        )
+        self.assertEqual(counts.get_feed_count(
+            feeds[1], Post.objects.filter(group=self.group)
+        ), 0)
+        self.assertEqual(fragments.versions(feeds), before)
+
+    def test_deleted_ids_not_reused(self):
+        """id удаленного последнего поста не достается новому."""
+        latest = Post.objects.create(text='Удалю', author=self.author)
+        deleted_pk = latest.pk
+        latest.delete()
+        posts = bulk.create_posts(self.user, [
+            Post(text=f'Новый {i}') for i in range(2)
+        ])
+        self.assertGreater(posts[0].pk, deleted_pk)
+        self.assertEqual(posts[1].pk, posts[0].pk + 1)
+        after = Post.objects.create(text='Обычный', author=self.author)
+        self.assertGreater(after.pk, posts[1].pk)
+
+    def test_boolean_post_id_rejected(self):
+        """true в поле post не считается id поста."""
+        Post.objects.update_or_create(
+            pk=1, defaults={'text': 'Первый', 'author': self.author},
+        )
+        response = self.send(ndjson(
+            {'type': 'comment', 'post': True, 'text': 'Ответ'},
+        ))
+        self.assertEqual(response.json()['errors'], [
+            {'line': 1, 'errors': {'post': ['Пост не найден']}},
+        ])
+
+    def test_requires_authenticated_post(self):
+        self.assertEqual(
+            self.client.get(reverse('api:batch')).status_code, 405
+        )
+        self.client.logout()
+        self.assertEqual(self.send('').status_code, 401)
+
+    def test_command_writes_in_batches(self):
+        """manage.py import_ndjson пишет файл пачками по --batch-size."""
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as source:
+            source.write(ndjson(*(
+                {'type': 'post', 'text': f'Пост {i}'} for i in range(5)
+            )))
+            source.flush()
+            out = StringIO()
+            call_command(
+                'import_ndjson', source.name, user='importer',
+                batch_size=2, stdout=out, stderr=StringIO(),
+            )
+        self.assertIn('post: 5', out.getvalue())
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 5)
@@ -0,0 +1,30 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    # Все посты
+    path('posts/', views.post_list, name='post_list'),
+    # Комментарии поста
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments',
+    ),
+    # Группы и их посты
+    path('groups/', views.group_list, name='group_list'),
+    path('groups/<slug:slug>/posts/', views.group_posts, name='group_posts'),
+    # Профиль и посты автора
+    path('profiles/<str:username>/', views.profile, name='profile'),
+    path(
+        'profiles/<str:username>/posts/',
+        views.profile_posts,
+        name='profile_posts',
+    ),
+    # Лента подписок текущего пользователя
+    path('follow/', views.follow_feed, name='follow_feed'),
+    # Пакетное создание постов, комментариев и подписок
+    path('batch/', views.batch, name='batch'),
+]
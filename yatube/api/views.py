@@ -0,0 +1,145 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+
+from core import replica
+from posts import stats
+from posts.models import Comment, Group, Post
+
+from .batch import write_batch
+from .streaming import BadRequest, DateKeyset, IdKeyset, stream
+
+User = get_user_model()
+
+# Поле ответа -> путь для values()
+POST_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    # Размеры картинки: клиент резервирует место до ее загрузки
+    'image_width': 'image_width',
+    'image_height': 'image_height',
+}
+GROUP_FIELDS = {
+    'id': 'pk',
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+}
+COMMENT_FIELDS = {
+    'id': 'pk',
+    'post': 'post_id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+}
+
+
+def image_url(name):
+    if not name:
+        return None
+    return Post._meta.get_field('image').storage.url(name)
+
+
+POST_TRANSFORMS = {'image': image_url}
+
+
+def error(status, detail):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def api_view(view):
+    """Только GET, чтение с реплики и ошибки в виде JSON."""
+    @replica.read_only
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in replica.SAFE_METHODS:
+            return error(405, 'Метод не поддерживается')
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as exc:
+            return error(400, str(exc))
+        except Http404:
+            return error(404, 'Не найдено')
+    return wrapper
+
+
+def stream_posts(request, queryset):
+    return stream(
+        request, queryset, POST_FIELDS, DateKeyset(), POST_TRANSFORMS
+    )
+
+
+@api_view
+def post_list(request):
+    return stream_posts(request, Post.objects.all())
+
+
+@api_view
+def group_list(request):
+    return stream(request, Group.objects.all(), GROUP_FIELDS, IdKeyset())
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return stream_posts(request, Post.objects.filter(group=group))
+
+
+@api_view
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    author_stats = stats.user_stats(author.pk)
+    return JsonResponse({
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts_count': author_stats.posts_count,
+        'followers_count': author_stats.followers_count,
+        'following_count': author_stats.following_count,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return stream_posts(request, Post.objects.filter(author=author))
+
+
+@api_view
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    return stream(
+        request, Comment.objects.filter(post=post), COMMENT_FIELDS,
+        DateKeyset(),
+    )
+
+
+@api_view
+def follow_feed(request):
+    if not request.user.is_authenticated:
+        return error(401, 'Нужна авторизация')
+    return stream_posts(request, Post.objects.filter(
+        author__following__user=request.user
+    ))
+
+
+def batch(request):
+    """Пакетная запись: тело запроса — NDJSON, см. api.batch.
+
+    Авторизация сессией, как у остального сайта; CSRF-токен
+    передается заголовком X-CSRFToken.
+    """
+    if request.method != 'POST':
+        return error(405, 'Метод не поддерживается')
+    if not request.user.is_authenticated:
+        return error(401, 'Нужна авторизация')
+    # Тело читается построчно, целиком в память не загружается
+    result = write_batch(request.user, request)
+    return JsonResponse(
+        result.as_dict(), json_dumps_params={'ensure_ascii': False}
+    )
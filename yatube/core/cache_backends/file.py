@@ -0,0 +1,76 @@
+import os
+import pickle
+import tempfile
+import time
+import zlib
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.core.files.move import file_move_safe
+
+
+class LockingFileBasedCache(FileBasedCache):
+    """FileBasedCache с атомарными add() и incr() между процессами.
+
+    Штатный бэкенд делает get + set без блокировки, и два воркера,
+    одновременно увеличивающие версию ленты, могут записать одно
+    и то же значение.
+    """
+
+    lock_name = '.lock'
+
+    def _locked(self):
+        self._createdir()
+        lock_file = open(os.path.join(self._dir, self.lock_name), 'ab')
+        locks.lock(lock_file, locks.LOCK_EX)
+        return lock_file
+
+    def _unlock(self, lock_file):
+        locks.unlock(lock_file)
+        lock_file.close()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        lock_file = self._locked()
+        try:
+            return super().add(key, value, timeout, version)
+        finally:
+            self._unlock(lock_file)
+
+    def incr(self, key, delta=1, version=None):
+        """Увеличивает значение, сохраняя срок жизни ключа.
+
+        BaseCache.incr перезаписывает ключ через set() с default_timeout,
+        и бессрочная версия ленты истекала бы через TIMEOUT секунд.
+        """
+        lock_file = self._locked()
+        try:
+            fname = self._key_to_file(key, version)
+            try:
+                with open(fname, 'rb') as f:
+                    expiry = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                raise ValueError(f"Key '{key}' not found")
+            if expiry is not None and expiry < time.time():
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            self._replace(fname, expiry, value)
+            return value
+        finally:
+            self._unlock(lock_file)
+
+    def _replace(self, fname, expiry, value):
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        renamed = False
+        try:
+            with open(fd, 'wb') as f:
+                f.write(pickle.dumps(expiry, self.pickle_protocol))
+                f.write(zlib.compress(
+                    pickle.dumps(value, self.pickle_protocol)
+                ))
+            file_move_safe(tmp_path, fname, allow_overwrite=True)
+            renamed = True
+        finally:
+            if not renamed:
+                os.remove(tmp_path)
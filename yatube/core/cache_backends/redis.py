@@ -0,0 +1,206 @@
+import pickle
+import socket
+import threading
+from urllib.parse import urlparse
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+DEFAULT_PORT = 6379
+# INCRBY создал бы отсутствующий ключ со значением delta, поэтому
+# проверка и увеличение идут одним скриптом, атомарно на сервере
+INCR_SCRIPT = (
+    "if redis.call('EXISTS', KEYS[1]) == 1 then "
+    "return redis.call('INCRBY', KEYS[1], ARGV[1]) end "
+    "return false"
+)
+
+
+class RedisError(Exception):
+    pass
+
+
+class RespConnection:
+    """Минимальный клиент протокола RESP (Redis, KeyDB, Dragonfly)."""
+
+    def __init__(self, host, port, db, timeout):
+        self._socket = socket.create_connection((host, port), timeout)
+        self._file = self._socket.makefile('rb')
+        if db:
+            self.execute('SELECT', db)
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def execute(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self._socket.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('Соединение с сервером кеша закрыто')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RedisError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f'Неизвестный ответ сервера: {line!r}')
+
+
+class RedisCache(BaseCache):
+    """Кеш на сервере с протоколом Redis: LOCATION = redis://host:port/db.
+
+    Целые числа хранятся как есть, чтобы incr() выполнялся атомарной
+    командой INCRBY на сервере; остальные значения сериализуются pickle.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        if '://' not in location:
+            location = f'redis://{location}'
+        url = urlparse(location)
+        self._host = url.hostname or '127.0.0.1'
+        self._port = url.port or DEFAULT_PORT
+        self._db = int(url.path.strip('/') or 0)
+        self._socket_timeout = params.get('OPTIONS', {}).get(
+            'SOCKET_TIMEOUT', 5
+        )
+        self._local = threading.local()
+
+    @property
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = RespConnection(
+                self._host, self._port, self._db, self._socket_timeout,
+            )
+            self._local.client = client
+        return client
+
+    def _execute(self, *args):
+        try:
+            return self._client.execute(*args)
+        except (ConnectionError, OSError):
+            # Сервер мог перезапуститься: одна попытка с новым соединением
+            self.disconnect()
+            return self._client.execute(*args)
+
+    def _encode(self, value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _decode(self, data):
+        if data is None:
+            return None
+        try:
+            return int(data)
+        except ValueError:
+            return pickle.loads(data)
+
+    def _expiry_args(self, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return ()
+        return ('PX', max(int(timeout * 1000), 1))
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        value = self._decode(self._execute('GET', self._key(key, version)))
+        return default if value is None else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._execute(
+            'MGET', *[self._key(key, version) for key in keys]
+        )
+        return {
+            key: self._decode(value)
+            for key, value in zip(keys, values) if value is not None
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        if timeout is not None and timeout != DEFAULT_TIMEOUT and timeout <= 0:
+            self._execute('DEL', key)
+            return
+        self._execute(
+            'SET', key, self._encode(value), *self._expiry_args(timeout)
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        reply = self._execute(
+            'SET', key, self._encode(value), 'NX',
+            *self._expiry_args(timeout),
+        )
+        return reply == 'OK'
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        value = self._execute('EVAL', INCR_SCRIPT, 1, key, delta)
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expiry = self._expiry_args(timeout)
+        if not expiry:
+            return bool(self._execute('PERSIST', key)) or bool(
+                self._execute('EXISTS', key)
+            )
+        return bool(self._execute('PEXPIRE', key, expiry[1]))
+
+    def delete(self, key, version=None):
+        self._execute('DEL', self._key(key, version))
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._execute('DEL', *keys)
+
+    def has_key(self, key, version=None):
+        return bool(self._execute('EXISTS', self._key(key, version)))
+
+    def clear(self):
+        self._execute('FLUSHDB')
+
+    def close(self, **kwargs):
+        # Django закрывает кеши после каждого запроса; соединение
+        # с сервером переиспользуется между запросами потока.
+        pass
+
+    def disconnect(self):
+        client = getattr(self._local, 'client', None)
+        if client is not None:
+            client.close()
+            self._local.client = None
@@ -0,0 +1,70 @@
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+# Прагмы по умолчанию, OPTIONS['pragmas'] дополняет и переопределяет их
+PRAGMAS = {
+    # Читатели не ждут писателя, писатель не ждет читателей
+    'journal_mode': 'wal',
+    # В WAL fsync только на checkpoint: коммит не теряется при падении
+    # процесса, только при отключении питания
+    'synchronous': 'normal',
+    # Отрицательное значение — размер страничного кеша в КиБ
+    'cache_size': -20_000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+    'busy_timeout': 5000,
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+# Ключи OPTIONS, которые обрабатывает обертка, а не sqlite3.connect()
+OWN_OPTIONS = ('pragmas', 'transaction_mode')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд SQLite, настроенный на конкурентную нагрузку.
+
+    При подключении выставляет прагмы (WAL, synchronous, кеш, mmap,
+    busy_timeout), а OPTIONS['transaction_mode'] задает, как открываются
+    транзакции: с IMMEDIATE писатель берет блокировку сразу и ждет
+    ее по busy_timeout, а не падает с «database is locked» при попытке
+    повысить блокировку посреди транзакции. Соединение переживает
+    запрос при CONN_MAX_AGE > 0, и прагмы выставляются один раз.
+    """
+
+    def pragmas(self):
+        pragmas = {
+            **PRAGMAS,
+            **self.settings_dict['OPTIONS'].get('pragmas', {}),
+        }
+        for name, value in pragmas.items():
+            if not name.isidentifier() or not PRAGMA_VALUE.match(str(value)):
+                raise ImproperlyConfigured(
+                    f'Некорректная прагма SQLite: {name} = {value!r}'
+                )
+        return pragmas
+
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'transaction_mode должен быть одним из {TRANSACTION_MODES}'
+            )
+        return mode and mode.upper()
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in OWN_OPTIONS:
+            params.pop(option, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas().items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.transaction_mode()
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,121 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+registry = {}
+
+
+class UnknownTask(Exception):
+    pass
+
+
+def task(name):
+    """Регистрирует функцию как задачу очереди под именем name.
+
+    Аргументы задачи передаются через JSON, поэтому это должны быть
+    простые значения: id, строки, числа.
+    """
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return registry[name]
+    except KeyError:
+        raise UnknownTask(name)
+
+
+def enqueue(_name, delay=0, max_attempts=None, **kwargs):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Задача появится у воркера только вместе с данными, которые ее
+    породили. В режиме JOBS_EAGER выполняется сразу; упавшая задача,
+    как и у воркера, не роняет вызывающий код, а остается в таблице
+    с состоянием «не выполнена». Имя задачи начинается
+    с подчеркивания, чтобы не конфликтовать с ее аргументом name.
+    """
+    func = get_task(_name)
+    job = Job(
+        name=_name,
+        payload=json.dumps(kwargs),
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    if not settings.JOBS_EAGER:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            func(**kwargs)
+    except Exception:
+        job.attempts = 1
+        job.status = Job.FAILED
+        job.last_error = traceback.format_exc()
+        job.save()
+        logger.error('Задача %s не выполнена:\n%s', job, job.last_error)
+    return None
+
+
+def claim(limit, visibility_timeout):
+    """Забирает до limit готовых задач, возвращает их id.
+
+    Задача, чей воркер не отчитался за visibility_timeout секунд,
+    считается брошенной и выдается снова. Захват — условный UPDATE,
+    поэтому одну задачу не заберут два воркера.
+    """
+    now = timezone.now()
+    ready = Q(status=Job.QUEUED, run_after__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now
+    )
+    candidates = Job.objects.filter(ready).values_list(
+        'pk', flat=True
+    )[:limit]
+    claimed = []
+    for pk in candidates:
+        updated = Job.objects.filter(ready, pk=pk).update(
+            status=Job.RUNNING,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+        )
+        if updated:
+            claimed.append(pk)
+    return claimed
+
+
+def backoff(attempts):
+    return timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def execute(pk):
+    """Выполняет захваченную задачу; успешная удаляется из очереди."""
+    job = Job.objects.filter(pk=pk, status=Job.RUNNING).first()
+    if job is None:
+        return False
+    job.attempts += 1
+    try:
+        with transaction.atomic():
+            get_task(job.name)(**json.loads(job.payload))
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            logger.error('Задача %s не выполнена:\n%s', job, job.last_error)
+        else:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + backoff(job.attempts)
+        job.locked_until = None
+        job.save()
+        return False
+    job.delete()
+    return True
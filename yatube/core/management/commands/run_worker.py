@@ -0,0 +1,80 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи фоновой очереди пулом процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.JOBS_WORKERS,
+            help='Размер пула; 0 — выполнять задачи в этом процессе',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=settings.JOBS_BATCH,
+            help='Сколько задач забирать за раз',
+        )
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            default=settings.JOBS_VISIBILITY_TIMEOUT,
+            help='Через сколько секунд незавершенная задача выдается снова',
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди, секунды',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и выйти',
+        )
+
+    def handle(self, *args, **options):
+        pool = None
+        if options['processes']:
+            # spawn, а не fork: дочерние процессы открывают свои
+            # соединения с БД, а не наследуют соединение родителя
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                max_workers=options['processes'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        done = failed = 0
+        try:
+            while True:
+                claimed = jobs.claim(
+                    options['batch'], options['visibility_timeout']
+                )
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                if pool is None:
+                    results = [jobs.execute(pk) for pk in claimed]
+                else:
+                    results = list(pool.map(jobs.execute, claimed))
+                done += sum(results)
+                failed += len(results) - sum(results)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
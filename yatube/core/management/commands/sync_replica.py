@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import replica
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в реплику-заглушку'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every',
+            type=float,
+            help='Повторять каждые столько секунд, имитируя отставание',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            if not replica.sync():
+                raise CommandError(
+                    'Реплика совпадает с основной базой: '
+                    'задайте YATUBE_DB_REPLICA'
+                )
+            self.stdout.write(
+                f'{settings.REPLICA_DATABASE}: скопировано за '
+                f'{time.monotonic() - started:.2f} с'
+            )
+            if not options['every']:
+                return
+            time.sleep(options['every'])
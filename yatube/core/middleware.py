@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import replica
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_stats = {}
+UNRESOLVED = 'unresolved'
+
+
+class QueryRecorder:
+    """execute_wrapper, считающий запросы и время, проведенное в БД."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def record(view, count, duration):
+    budget = settings.QUERY_BUDGETS.get(view)
+    with _lock:
+        stats = _stats.setdefault(view, {
+            'requests': 0,
+            'queries': 0,
+            'max_queries': 0,
+            'db_time': 0.0,
+            'over_budget': 0,
+            'budget': budget,
+        })
+        stats['requests'] += 1
+        stats['queries'] += count
+        stats['max_queries'] = max(stats['max_queries'], count)
+        stats['db_time'] += duration
+        if budget is not None and count > budget:
+            stats['over_budget'] += 1
+
+
+def query_report():
+    """Накопленная статистика по вьюхам, худшие по запросам первыми."""
+    with _lock:
+        rows = [dict(stats, view=view) for view, stats in _stats.items()]
+    return sorted(rows, key=lambda row: row['max_queries'], reverse=True)
+
+
+def reset_report():
+    with _lock:
+        _stats.clear()
+
+
+class QueryCountMiddleware:
+    """Считает SQL-запросы и время БД каждого запроса.
+
+    Пишет их в заголовки X-DB-Queries и X-DB-Time, копит статистику
+    по имени вьюхи и предупреждает в лог, если вьюха превысила свой
+    бюджет из settings.QUERY_BUDGETS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        # Адреса без вьюхи (404) идут в одну строку отчета, иначе
+        # перебор несуществующих адресов раздувал бы статистику
+        view = match.view_name if match else UNRESOLVED
+        record(view, recorder.count, recorder.duration)
+        response['X-DB-Queries'] = recorder.count
+        response['X-DB-Time'] = f'{recorder.duration * 1000:.1f}ms'
+
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                '%s: %d SQL-запросов при бюджете %d',
+                view, recorder.count, budget,
+            )
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет пользователя за основной базой после записи.
+
+    Успешный небезопасный запрос ставит cookie на
+    REPLICA_PIN_SECONDS секунд; пока она жива, вьюхи с
+    replica.read_only читают из default, и свой пост или комментарий
+    виден сразу, даже если реплика еще не догнала основную базу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (settings.REPLICA_READS
+                and request.method not in replica.SAFE_METHODS
+                and response.status_code < 400):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD')
+_reading = ContextVar('reading_from_replica', default=False)
+
+
+def is_reading():
+    """Идет ли сейчас код, которому разрешено читать с реплики."""
+    return _reading.get()
+
+
+@contextmanager
+def reading_from_replica():
+    token = _reading.set(True)
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+def is_pinned(request):
+    """Пользователь недавно что-то записал и должен видеть это сразу."""
+    return settings.REPLICA_PIN_COOKIE in request.COOKIES
+
+
+def read_only(view):
+    """Разрешает вьюхе читать с реплики.
+
+    Не действует для небезопасных методов и для пользователя,
+    закрепленного за основной базой после записи (см. ReplicaPinMiddleware).
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.REPLICA_READS
+                or request.method not in SAFE_METHODS
+                or is_pinned(request)):
+            return view(request, *args, **kwargs)
+        with reading_from_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def sync(source=DEFAULT_DB_ALIAS, target=None):
+    """Копирует основную базу SQLite в реплику-заглушку.
+
+    Настоящая реплика догоняет основную базу сама; заглушка —
+    второй файл SQLite — обновляется только этим вызовом, и между
+    вызовами видно отставание, как у реплики под нагрузкой.
+    """
+    source = connections[source]
+    target = connections[target or settings.REPLICA_DATABASE]
+    if source.settings_dict['NAME'] == target.settings_dict['NAME']:
+        return False
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
+    return True
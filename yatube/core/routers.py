@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import replica
+
+
+class ReplicaRouter:
+    """Чтения вьюх с replica.read_only — с реплики, запись — в default.
+
+    Внутри транзакции чтение остается в основной базе: код, который
+    сначала пишет, а потом читает, должен видеть свою запись.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (replica.is_reading()
+                and not connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
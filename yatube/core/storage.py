@@ -0,0 +1,90 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from .models import StoredFile
+
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под именем, вычисленным из их содержимого.
+
+    Файл из upload_to='posts/' с содержимым, чей sha256 равен abcd…,
+    ляжет в posts/ab/cd/abcd….jpg. Одинаковые загрузки получают одно
+    имя и записываются на диск один раз.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        key = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, key[:2], key[2:4], key + extension)
+
+    def owns(self, name):
+        """Имя выдано этим хранилищем, а не задано вручную."""
+        return bool(name) and HASHED_NAME.search(name) is not None
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return self._save(name, content)
+
+
+def is_tracked(name, storage):
+    return isinstance(storage, ContentAddressedStorage) and storage.owns(name)
+
+
+def acquire(name, storage):
+    """Добавляет ссылку на файл."""
+    if not is_tracked(name, storage):
+        return
+    updated = StoredFile.objects.filter(name=name).update(refs=F('refs') + 1)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            StoredFile.objects.create(name=name, refs=1)
+    except IntegrityError:
+        StoredFile.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+def release(name, storage):
+    """Снимает ссылку на файл; последняя ссылка удаляет его с миниатюрами.
+
+    Файлы с именами не из хранилища (загруженные раньше или заданные
+    вручную) не учитываются и не удаляются. Удаление с диска выполняется
+    после коммита и только если за это время на файл никто снова
+    не сослался.
+    """
+    if not is_tracked(name, storage):
+        return
+    StoredFile.objects.filter(name=name, refs__gt=0).update(
+        refs=F('refs') - 1
+    )
+    deleted, _ = StoredFile.objects.filter(name=name, refs=0).delete()
+    if deleted:
+        transaction.on_commit(lambda: reclaim(name, storage))
+
+
+def reclaim(name, storage):
+    if not StoredFile.objects.filter(name=name).exists():
+        delete_thumbnails(ImageFile(name, storage))
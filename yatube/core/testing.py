@@ -0,0 +1,87 @@
+import math
+from contextlib import ContextDecorator, contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve
+
+
+class max_queries(ContextDecorator):
+    """Падает, если внутри блока выполнено больше limit SQL-запросов.
+
+    Работает и как контекстный менеджер, и как декоратор теста.
+    """
+
+    def __init__(self, limit, using=DEFAULT_DB_ALIAS):
+        self.limit = limit
+        self.using = using
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        executed = len(self.context)
+        if executed > self.limit:
+            queries = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(
+                    self.context.captured_queries, start=1
+                )
+            )
+            raise AssertionError(
+                f'{executed} запросов при бюджете {self.limit}:\n{queries}'
+            )
+        return False
+
+
+@contextmanager
+def commit_callbacks(using=DEFAULT_DB_ALIAS):
+    """Выполняет колбэки transaction.on_commit, зарегистрированные в блоке.
+
+    TestCase не фиксирует свою транзакцию, и колбэки в нем не вызываются;
+    блок доигрывает их на выходе, как коммит. Аналог
+    captureOnCommitCallbacks(execute=True) из Django 3.2.
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for _, callback in callbacks:
+        callback()
+
+
+def throwaway_cache():
+    """Подменяет кеш по умолчанию отдельным LocMemCache процесса.
+
+    Замеры с холодным кешем очищают его между запросами; общий кеш
+    (redis, sqlite, файлы) при этом остается нетронутым.
+    """
+    return override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'throwaway',
+        },
+    })
+
+
+def view_budget(path):
+    """Бюджет запросов вьюхи, обслуживающей path."""
+    return settings.QUERY_BUDGETS[resolve(path.split('?')[0]).view_name]
+
+
+def get_within_budget(client, path):
+    """GET-запрос, который должен уложиться в бюджет своей вьюхи."""
+    with max_queries(view_budget(path)):
+        return client.get(path)
+
+
+def percentile(ordered, rank):
+    """Перцентиль по ближайшему рангу из отсортированного списка."""
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
@@ -0,0 +1,197 @@
+import multiprocessing
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from ..cache_backends.file import LockingFileBasedCache
+from ..cache_backends.redis import INCR_SCRIPT, RedisCache
+from ..cache_backends.sqlite import SQLiteCache
+
+WORKERS = 4
+INCREMENTS = 25
+
+
+def bump_many(backend, location):
+    cache = backend(location, {})
+    for _ in range(INCREMENTS):
+        cache.incr('version')
+
+
+class SharedBackendMixin:
+    """Общие проверки бэкендов, разделяемых между процессами."""
+
+    def make_cache(self):
+        return self.backend(self.location, {})
+
+    def test_basic_operations(self):
+        """set/get/add/delete/touch работают как у штатных бэкендов"""
+        cache = self.make_cache()
+        cache.set('post', {'text': 'Тестовый пост'})
+        self.assertEqual(cache.get('post'), {'text': 'Тестовый пост'})
+        self.assertFalse(cache.add('post', 'другое значение'))
+        self.assertTrue(cache.add('group', 'Тестовая группа'))
+        self.assertEqual(cache.get_many(['post', 'group', 'missing']), {
+            'post': {'text': 'Тестовый пост'},
+            'group': 'Тестовая группа',
+        })
+        cache.delete('post')
+        self.assertIsNone(cache.get('post'))
+        cache.set('short', 1, timeout=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('short'))
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_incr_keeps_expiry(self):
+        """incr не дает бессрочному ключу срок жизни по умолчанию"""
+        cache = self.backend(self.location, {'TIMEOUT': 0.05})
+        cache.set('version', 1, None)
+        self.assertEqual(cache.incr('version'), 2)
+        time.sleep(0.1)
+        self.assertEqual(cache.get('version'), 2)
+
+    def test_incr_is_atomic_between_processes(self):
+        """Версии, увеличиваемые из разных процессов, не теряются"""
+        cache = self.make_cache()
+        cache.set('version', 1, None)
+        processes = [
+            multiprocessing.Process(
+                target=bump_many, args=(self.backend, self.location),
+            )
+            for _ in range(WORKERS)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(cache.get('version'), 1 + WORKERS * INCREMENTS)
+
+
+class SQLiteCacheTest(SharedBackendMixin, SimpleTestCase):
+    backend = SQLiteCache
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = f'{self.directory}/cache.sqlite3'
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class LockingFileBasedCacheTest(SharedBackendMixin, SimpleTestCase):
+    backend = LockingFileBasedCache
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = self.directory
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Локальная замена сервера Redis: только нужные бэкенду команды."""
+
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def reply(self, value):
+        if value is None:
+            self.wfile.write(b'$-1\r\n')
+        elif isinstance(value, int):
+            self.wfile.write(b':%d\r\n' % value)
+        elif isinstance(value, list):
+            self.wfile.write(b'*%d\r\n' % len(value))
+            for item in value:
+                self.reply(item)
+        elif value == 'OK':
+            self.wfile.write(b'+OK\r\n')
+        else:
+            self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+
+    def handle(self):
+        data, lock = self.server.data, self.server.lock
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command, args = args[0].upper(), args[1:]
+            with lock:
+                self.reply(self.run(data, command, args))
+
+    def run(self, data, command, args):
+        if command == b'GET':
+            return data.get(args[0])
+        if command == b'MGET':
+            return [data.get(key) for key in args]
+        if command == b'SET':
+            if b'NX' in args and args[0] in data:
+                return None
+            data[args[0]] = args[1]
+            return 'OK'
+        if command == b'DEL':
+            return sum(data.pop(key, None) is not None for key in args)
+        if command == b'EXISTS':
+            return int(args[0] in data)
+        if command == b'EVAL' and args[0] == INCR_SCRIPT.encode():
+            key, delta = args[2], int(args[3])
+            if key not in data:
+                return None
+            data[key] = b'%d' % (int(data[key]) + delta)
+            return int(data[key])
+        if command == b'FLUSHDB':
+            data.clear()
+            return 'OK'
+        return 1
+
+
+class RedisCacheTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0), FakeRedisHandler,
+        )
+        cls.server.daemon_threads = True
+        cls.server.data = {}
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        host, port = cls.server.server_address
+        cls.location = f'redis://{host}:{port}/0'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_round_trip_and_incr(self):
+        """Клиент RESP сохраняет значения и атомарно увеличивает числа"""
+        cache = RedisCache(self.location, {})
+        cache.clear()
+        cache.set('post', {'text': 'Тестовый пост'})
+        cache.set('version', 41, None)
+        self.assertEqual(cache.get('post'), {'text': 'Тестовый пост'})
+        self.assertEqual(cache.incr('version'), 42)
+        self.assertEqual(cache.get_many(['post', 'version', 'missing']), {
+            'post': {'text': 'Тестовый пост'},
+            'version': 42,
+        })
+        self.assertFalse(cache.add('version', 1))
+        cache.delete_many(['post', 'version'])
+        self.assertNotIn('post', cache)
+        with self.assertRaises(ValueError):
+            cache.incr('version')
+        # Отсутствующий ключ не создается заново
+        self.assertNotIn('version', cache)
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Job
+
+User = get_user_model()
+calls = []
+
+
+@jobs.task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@jobs.task('tests.fail')
+def fail():
+    raise RuntimeError('сбой')
+
+
+@override_settings(JOBS_EAGER=False)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_execute(self):
+        """Задача ставится в очередь и удаляется после выполнения"""
+        job = jobs.enqueue('tests.record', value=1)
+        self.assertEqual(calls, [])
+        self.assertEqual(jobs.claim(10, 60), [job.pk])
+        self.assertEqual(jobs.claim(10, 60), [])
+        self.assertTrue(jobs.execute(job.pk))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode(self):
+        """В режиме JOBS_EAGER задача выполняется сразу"""
+        self.assertIsNone(jobs.enqueue('tests.record', value=2))
+        self.assertEqual(calls, [2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_unknown_task(self):
+        """Незарегистрированную задачу нельзя поставить в очередь"""
+        with self.assertRaises(jobs.UnknownTask):
+            jobs.enqueue('tests.missing')
+
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется позже, а после лимита — FAILED"""
+        job = jobs.enqueue('tests.fail', max_attempts=2)
+        jobs.claim(10, 60)
+        self.assertFalse(jobs.execute(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('RuntimeError', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        jobs.claim(10, 60)
+        jobs.execute(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(jobs.claim(10, 60), [])
+
+    def test_visibility_timeout(self):
+        """Задача упавшего воркера выдается снова после таймаута"""
+        job = jobs.enqueue('tests.record', value=3)
+        jobs.claim(10, 60)
+        Job.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(jobs.claim(10, 60), [job.pk])
+
+    def test_worker_command(self):
+        """run_worker --once выполняет все готовые задачи"""
+        for value in range(3):
+            jobs.enqueue('tests.record', value=value)
+        out = StringIO()
+        call_command('run_worker', once=True, processes=0, stdout=out)
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        self.assertIn('Выполнено задач: 3', out.getvalue())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_failure_is_recorded(self):
+        """Упавшая сразу задача не бросает исключение и видна в очереди"""
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertIsNone(jobs.enqueue('tests.fail'))
+        job = Job.objects.get(name='tests.fail')
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('RuntimeError', job.last_error)
+
+    def test_password_reset_mail_is_queued(self):
+        """Письмо сброса пароля уходит через очередь"""
+        User.objects.create_user(
+            username='user', email='user@example.com', password='pass',
+        )
+        Client().post(
+            reverse('users:password_reset_form'),
+            {'email': 'user@example.com'},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        # Ссылка с токеном не хранится в аргументах задачи
+        self.assertNotIn('/reset/', Job.objects.get().payload)
+        call_command('run_worker', once=True, processes=0, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        self.assertIn('/auth/reset/', mail.outbox[0].body)
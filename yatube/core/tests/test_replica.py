@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, UserStats
+
+from ..replica import sync
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_READS=True)
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            text='Первый пост', author=self.author, group=self.group,
+        )
+        self.client = Client()
+        self.client.force_login(self.author)
+        # Реплика догнала основную базу до начала теста
+        sync()
+
+    def test_read_views_use_replica(self):
+        """Ленты читаются с реплики и видят запись только после sync."""
+        Post.objects.create(text='Свежий пост', author=self.author)
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertNotContains(response, 'Свежий пост')
+
+        sync()
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertContains(response, 'Свежий пост')
+
+    def test_writer_pinned_to_primary(self):
+        """Автор комментария сразу видит его, другие — после sync."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.post(
+            reverse('posts:comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Мой комментарий'},
+        )
+        pin = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(pin['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertTrue(Comment.objects.filter(text='Мой комментарий'))
+        self.assertContains(self.client.get(url), 'Мой комментарий')
+
+        reader = Client()
+        self.assertNotContains(reader.get(url), 'Мой комментарий')
+
+    def test_stale_render_not_served_to_pinned_author(self):
+        """Страница, собранная с реплики, не достается автору из кеша"""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Свежий пост', 'group': self.group.pk,
+        })
+        reader = Client()
+        urls = (
+            reverse('posts:main_page'),
+            reverse('posts:posts_by_groups', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = reader.get(url)
+                self.assertNotContains(response, 'Свежий пост')
+                self.assertFalse(response.has_header('ETag'))
+                self.assertContains(self.client.get(url), 'Свежий пост')
+        response = self.client.get(
+            reverse('posts:posts_by_groups', kwargs={'slug': 'group'})
+        )
+        self.assertEqual(response.context['group'].posts_count, 2)
+
+    def test_counters_computed_from_primary(self):
+        """Недостающие счетчики считаются по основной базе, а не реплике"""
+        UserStats.objects.all().delete()
+        sync()
+        Post.objects.create(text='Свежий пост', author=self.author)
+        Client().get(reverse('posts:profile', kwargs={'username': 'author'}))
+        self.assertEqual(
+            UserStats.objects.get(pk=self.author.pk).posts_count, 2,
+        )
+
+    def test_replica_reads_disabled_by_default(self):
+        """Без REPLICA_READS все читается из основной базы."""
+        Post.objects.create(text='Свежий пост', author=self.author)
+        with override_settings(REPLICA_READS=False):
+            response = Client().get(reverse('posts:main_page'))
+        self.assertContains(response, 'Свежий пост')
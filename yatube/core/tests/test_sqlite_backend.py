@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+
+class SQLiteBackendTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.name = os.path.join(self.directory, 'db.sqlite3')
+        self.handler = None
+
+    def tearDown(self):
+        if self.handler is not None:
+            self.handler.close_all()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def connect(self, **options):
+        self.handler = ConnectionHandler({
+            alias: {
+                'ENGINE': 'core.db.backends.sqlite3',
+                'NAME': self.name,
+                'OPTIONS': options,
+            }
+            for alias in ('default', 'second')
+        })
+        return self.handler['default'], self.handler['second']
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        """Соединение открывается в WAL с заданными прагмами."""
+        first, _ = self.connect(pragmas={'cache_size': -1000})
+        self.assertEqual(self.pragma(first, 'journal_mode'), 'wal')
+        # NORMAL
+        self.assertEqual(self.pragma(first, 'synchronous'), 1)
+        self.assertEqual(self.pragma(first, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(first, 'cache_size'), -1000)
+
+    def test_immediate_transaction_takes_write_lock(self):
+        """С IMMEDIATE транзакция сразу блокирует других писателей."""
+        first, second = self.connect(
+            transaction_mode='IMMEDIATE', pragmas={'busy_timeout': 0},
+        )
+        with first.cursor() as cursor:
+            cursor.execute('CREATE TABLE note (text TEXT)')
+        # Так транзакцию открывает atomic() в режиме autocommit
+        first._start_transaction_under_autocommit()
+        with self.assertRaises(OperationalError):
+            with second.cursor() as cursor:
+                cursor.execute("INSERT INTO note VALUES ('занято')")
+        first.connection.rollback()
+
+    def test_invalid_options_rejected(self):
+        """Некорректные прагмы и режимы транзакций не принимаются."""
+        for options in (
+            {'pragmas': {'journal_mode': 'wal; DROP TABLE note'}},
+            {'transaction_mode': 'LAZY'},
+        ):
+            with self.subTest(options=options):
+                first, _ = self.connect(**options)
+                with self.assertRaises(ImproperlyConfigured):
+                    first.ensure_connection()
+                    first._start_transaction_under_autocommit()
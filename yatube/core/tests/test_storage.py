@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TransactionTestCase, override_settings
+
+from posts.models import Post
+
+from ..models import StoredFile
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = 'одинаковое содержимое'.encode()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+
+    def create_post(self, name, content=CONTENT):
+        post = Post(text='Пост', author=self.user)
+        post.image.save(name, ContentFile(content), save=False)
+        post.save()
+        return post
+
+    def refs(self, post):
+        return StoredFile.objects.get(name=post.image.name).refs
+
+    def test_duplicates_share_file(self):
+        """Одинаковые загрузки хранятся одним файлом под хешем"""
+        first = self.create_post('one.jpg')
+        second = self.create_post('two.jpg')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}'
+        )
+        self.assertEqual(self.refs(first), 2)
+
+    def test_last_delete_reclaims_file(self):
+        """Файл удаляется вместе с последним ссылающимся постом"""
+        first = self.create_post('one.jpg')
+        second = self.create_post('two.jpg')
+        storage, name = first.image.storage, first.image.name
+
+        first.delete()
+        self.assertTrue(storage.exists(name))
+        second.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_replacing_image_moves_reference(self):
+        """Замена картинки переносит ссылку на новый файл"""
+        post = self.create_post('one.jpg')
+        old_name, storage = post.image.name, post.image.storage
+        post.image.save('new.jpg', ContentFile('другое'.encode()), save=False)
+        post.save()
+        self.assertFalse(storage.exists(old_name))
+        self.assertEqual(self.refs(post), 1)
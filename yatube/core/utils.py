@@ -0,0 +1,11 @@
+import itertools
+
+
+def chunked(iterable, size):
+    """Списки по size элементов из любого итерируемого, лениво."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,125 @@
+from collections import Counter
+
+from django.db import connection, transaction
+
+from core import jobs
+
+from . import effects, feeds, search, stats
+from .models import Comment, Follow, GroupStats, Post, PostStats, UserStats
+
+
+def reserve_pks(model, count):
+    """Резервирует count id в sqlite_sequence и возвращает первый.
+
+    UPDATE берет блокировку записи при любом режиме транзакции, так что
+    параллельная пачка дождется ее и получит следующий диапазон. Как и
+    обычная вставка в AUTOINCREMENT-таблицу, id удаленных строк
+    не выдаются повторно.
+    """
+    table = model._meta.db_table
+    qn = connection.ops.quote_name
+    top = (
+        f'(SELECT COALESCE(MAX({qn(model._meta.pk.column)}), 0) '
+        f'FROM {qn(table)})'
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE sqlite_sequence SET seq = MAX(seq, {top}) + %s '
+            f'WHERE name = %s',
+            [count, table],
+        )
+        if not cursor.rowcount:
+            # В таблицу еще ни разу не вставляли строк
+            cursor.execute(
+                f'INSERT INTO sqlite_sequence (name, seq) '
+                f'SELECT %s, {top} + %s',
+                [table, count],
+            )
+        cursor.execute(
+            'SELECT seq FROM sqlite_sequence WHERE name = %s', [table]
+        )
+        return cursor.fetchone()[0] - count + 1
+
+
+def assign_pks(model, objects):
+    """Выдает id заранее, если БД не возвращает их из bulk_create."""
+    if connection.features.can_return_ids_from_bulk_insert:
+        return
+    first = reserve_pks(model, len(objects))
+    for pk, obj in enumerate(objects, start=first):
+        obj.pk = pk
+
+
+def create_posts(user, posts):
+    """bulk_create постов user с тем же эффектом, что у сигналов.
+
+    Счетчики, ленты, фрагменты и поиск обновляются один раз на пачку,
+    а не на каждый пост; кеш — после коммита, как и у сигналов.
+    Картинки не поддерживаются.
+    """
+    if not posts:
+        return []
+    for post in posts:
+        post.author = user
+    assign_pks(Post, posts)
+    Post.objects.bulk_create(posts)
+
+    groups = Counter(post.group_id for post in posts if post.group_id)
+    stats.bump(UserStats, user.pk, posts_count=len(posts))
+    for group_id, total in groups.items():
+        stats.bump(GroupStats, group_id, posts_count=total)
+    effects.posts_created(user.pk, posts)
+    if feeds.is_enabled():
+        for post in posts:
+            jobs.enqueue('posts.fan_out', post_id=post.pk)
+    search.index_posts([post.pk for post in posts])
+    return posts
+
+
+def create_comments(user, comments):
+    """bulk_create комментариев user; у каждого уже задан post."""
+    if not comments:
+        return []
+    for comment in comments:
+        comment.author = user
+    assign_pks(Comment, comments)
+    Comment.objects.bulk_create(comments)
+
+    per_post = Counter(comment.post_id for comment in comments)
+    stats.bump(UserStats, user.pk, comments_count=len(comments))
+    for post_id, total in per_post.items():
+        stats.bump(PostStats, post_id, comments_count=total)
+    effects.comments_changed({comment.post for comment in comments})
+    search.index_posts(list(per_post))
+    return comments
+
+
+def create_follows(user, authors):
+    """Подписывает user на авторов, на которых он еще не подписан."""
+    existing = set(Follow.objects.filter(
+        user=user, author__in=authors
+    ).values_list('author_id', flat=True))
+    follows = []
+    for author in authors:
+        if author.pk not in existing and author.pk != user.pk:
+            existing.add(author.pk)
+            follows.append(Follow(user=user, author=author))
+    if not follows:
+        return []
+    assign_pks(Follow, follows)
+    Follow.objects.bulk_create(follows)
+
+    stats.bump(UserStats, user.pk, following_count=len(follows))
+    for follow in follows:
+        stats.bump(UserStats, follow.author_id, followers_count=1)
+    effects.follows_changed(
+        user.pk, [follow.author_id for follow in follows]
+    )
+    if feeds.is_enabled():
+        for follow in follows:
+            jobs.enqueue(
+                'posts.backfill',
+                user_id=user.pk,
+                author_id=follow.author_id,
+            )
+    return follows
@@ -1,9 +1,149 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
 
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
-def paginator(request, post_list, AMOUNT):
+from .counts import CachedCountPaginator
 
-    paginator = Paginator(post_list, AMOUNT)
+CURSOR_PARAM = 'cursor'
+KEYSET_KEYS = ('pub_date', 'pk')
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, obj, keys=KEYSET_KEYS):
+    """Упаковывает позицию записи в непрозрачную строку для querystring."""
+    date_key, id_key = keys
+    raw = '|'.join((
+        direction,
+        getattr(obj, date_key).isoformat(),
+        str(getattr(obj, id_key)),
+    ))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (направление, дата, id) или None для битого курсора."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, date, pk = raw.split('|')
+        date = parse_datetime(date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or date is None:
+        return None
+    return direction, date, pk
+
+
+class KeysetPage(Page):
+    """Страница без номера: навигация только вперед/назад по курсору."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # Курсоры считаются сразу: object_list может быть подменен
+        # гидратированными постами, у которых нет ключей пагинации.
+        self.next_cursor = None
+        self.previous_cursor = None
+        if has_next and object_list:
+            self.next_cursor = encode_cursor(
+                NEXT, object_list[-1], paginator.keys
+            )
+        if has_previous and object_list:
+            self.previous_cursor = encode_cursor(
+                PREVIOUS, object_list[0], paginator.keys
+            )
+
+    def __repr__(self):
+        return '<Page by cursor>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+
+class KeysetPaginator(Paginator):
+    """Пагинация поиском по индексу (pub_date, id) вместо COUNT и OFFSET."""
+
+    def __init__(self, object_list, per_page, keys=KEYSET_KEYS):
+        super().__init__(object_list, per_page)
+        self.keys = keys
+
+    def _seek(self, date, pk, lookup):
+        date_key, id_key = self.keys
+        return self.object_list.filter(
+            Q(**{f'{date_key}__{lookup}': date})
+            | Q(**{date_key: date, f'{id_key}__{lookup}': pk})
+        )
+
+    def get_page(self, cursor):
+        date_key, id_key = self.keys
+        position = decode_cursor(cursor)
+        limit = self.per_page + 1
+
+        if position is None:
+            items = list(
+                self.object_list.order_by(f'-{date_key}', f'-{id_key}')
+                [:limit]
+            )
+            return KeysetPage(
+                items[:self.per_page], self,
+                has_next=len(items) > self.per_page,
+                has_previous=False,
+            )
+
+        direction, date, pk = position
+        if direction == NEXT:
+            items = list(
+                self._seek(date, pk, 'lt')
+                .order_by(f'-{date_key}', f'-{id_key}')[:limit]
+            )
+            return KeysetPage(
+                items[:self.per_page], self,
+                has_next=len(items) > self.per_page,
+                has_previous=True,
+            )
+
+        items = list(
+            self._seek(date, pk, 'gt')
+            .order_by(date_key, id_key)[:limit]
+        )
+        has_previous = len(items) > self.per_page
+        items = items[:self.per_page]
+        items.reverse()
+        return KeysetPage(
+            items, self, has_next=True, has_previous=has_previous,
+        )
+
+
+def cursor_paginator(request, object_list, AMOUNT, param=CURSOR_PARAM,
+                     keys=KEYSET_KEYS):
+    paginator = KeysetPaginator(object_list, AMOUNT, keys)
+    return paginator.get_page(request.GET.get(param))
+
+
+def paginator(request, post_list, AMOUNT, feed=None, keys=KEYSET_KEYS):
+
+    cursor = request.GET.get(CURSOR_PARAM)
+    if cursor is not None or settings.POSTS_PAGINATION == 'keyset':
+        return cursor_paginator(request, post_list, AMOUNT, keys=keys)
+
+    if feed is None:
+        paginator = Paginator(post_list, AMOUNT)
+    else:
+        paginator = CachedCountPaginator(post_list, AMOUNT, feed)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
@@ -0,0 +1,128 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import router
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+
+COUNT_KEY = 'posts:count:{feed}'
+# Поколение счетчиков лент подписок: меняется, когда пишут «звезды»
+FOLLOW_GENERATION_KEY = 'posts:count:follow_generation'
+ALL_FEED = 'all'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'author:{author_id}'
+
+
+def follow_feed(user_id):
+    return f'follow:{user_id}'
+
+
+def _initial_generation():
+    # Как и версии фрагментов: после вытеснения ключа поколение
+    # не должно совпасть с прежним
+    return int(time.time() * 1000)
+
+
+def follow_generation():
+    generation = cache.get(FOLLOW_GENERATION_KEY)
+    if generation is None:
+        cache.add(FOLLOW_GENERATION_KEY, _initial_generation(), None)
+        generation = cache.get(FOLLOW_GENERATION_KEY)
+    return generation
+
+
+def count_keys(feeds):
+    """Ключи счетчиков лент; счетчики подписок — в своем поколении."""
+    feeds = list(feeds)
+    generation = None
+    if any(feed.startswith('follow:') for feed in feeds):
+        generation = follow_generation()
+    return [
+        COUNT_KEY.format(feed=f'{feed}:{generation}')
+        if feed.startswith('follow:') else COUNT_KEY.format(feed=feed)
+        for feed in feeds
+    ]
+
+
+def count_key(feed):
+    return count_keys([feed])[0]
+
+
+def expire_follow_counts():
+    """Сбрасывает счетчики всех лент подписок одной операцией.
+
+    Для постов «звезд» вместо сдвига счетчика у каждого подписчика:
+    старые ключи больше не читаются и истекают сами.
+    """
+    try:
+        cache.incr(FOLLOW_GENERATION_KEY)
+    except ValueError:
+        cache.add(FOLLOW_GENERATION_KEY, _initial_generation(), None)
+
+
+def estimate_count(queryset):
+    """Оценка размера всей ленты по диапазону первичных ключей."""
+    bounds = queryset.model.objects.using(queryset.db).aggregate(
+        low=Min('pk'), high=Max('pk')
+    )
+    if bounds['low'] is None:
+        return 0
+    return bounds['high'] - bounds['low'] + 1
+
+
+def compute_count(feed, queryset):
+    """Точный COUNT(*) для небольших лент, оценка для очень больших.
+
+    Считается по основной базе: число ложится в общий кеш, и
+    посчитанное по отстающей реплике пережило бы ее синхронизацию.
+    """
+    queryset = queryset.using(router.db_for_write(queryset.model))
+    limit = settings.POSTS_COUNT_ESTIMATE_THRESHOLD
+    bounded = queryset.order_by()[:limit].count()
+    if bounded < limit:
+        return bounded
+    if feed == ALL_FEED:
+        return estimate_count(queryset)
+    return queryset.count()
+
+
+def get_feed_count(feed, queryset):
+    key = count_key(feed)
+    count = cache.get(key)
+    if count is None:
+        count = compute_count(feed, queryset)
+        cache.add(key, count, settings.POSTS_COUNT_TIMEOUT)
+    return count
+
+
+def shift_counts(feeds, delta):
+    """Сдвигает закешированные счетчики; отсутствующие посчитаются позже."""
+    for key in count_keys(feeds):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def forget_counts(feeds):
+    cache.delete_many(count_keys(feeds))
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берет общее число записей из кеша ленты."""
+
+    def __init__(self, object_list, per_page, feed):
+        super().__init__(object_list, per_page)
+        self.feed = feed
+
+    @cached_property
+    def count(self):
+        return get_feed_count(self.feed, self.object_list)
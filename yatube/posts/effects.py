@@ -0,0 +1,148 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from . import counts, feeds, fragments, summaries
+from .models import Follow, UserStats
+
+
+def post_feeds(post, group_id=None):
+    """Ленты, в которые попадает пост (кроме лент подписчиков)."""
+    names = [counts.ALL_FEED, counts.author_feed(post.author_id)]
+    if group_id:
+        names.append(counts.group_feed(group_id))
+    return names
+
+
+def follower_feeds(author_id):
+    """Ленты подписчиков автора или None, если автор — «звезда».
+
+    Сдвиг счетчика у каждого подписчика стоил бы записи «звезды»
+    загрузки всех подписчиков и incr на каждого; ее счетчики лент
+    подписок сбрасываются разом (counts.expire_follow_counts).
+    """
+    # Строка счетчиков не досчитывается: при каскадном удалении
+    # автора она вставилась бы для удаляемого пользователя
+    total = UserStats.objects.filter(pk=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    if total is not None and feeds.is_celebrity(total):
+        return None
+    limit = settings.FEED_CELEBRITY_THRESHOLD
+    followers = list(Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)[:limit])
+    if len(followers) >= limit:
+        return None
+    return [counts.follow_feed(user_id) for user_id in followers]
+
+
+def shift(changes, followers=()):
+    """Сдвигает счетчики лент на накопленные значения.
+
+    followers=None — пост «звезды»: счетчики подписок сбрасываются.
+    """
+    if followers is None:
+        counts.expire_follow_counts()
+    by_delta = {}
+    for feed, delta in changes.items():
+        by_delta.setdefault(delta, []).append(feed)
+    for delta, names in by_delta.items():
+        counts.shift_counts(names, delta)
+
+
+# Кеш не откатывается вместе с транзакцией: сдвинутый счетчик или
+# дописанный в сводку группы пост пережили бы откат, а фрагмент,
+# собранный под новой версией до коммита, — сам коммит. Что менять,
+# считается сразу, пока запись под рукой, а меняется кеш
+# в transaction.on_commit.
+
+def posts_created(author_id, posts):
+    """Новые посты одного автора, созданные по одному или пачкой."""
+    groups = Counter(post.group_id for post in posts if post.group_id)
+    names = [counts.ALL_FEED, counts.author_feed(author_id)]
+    followers = follower_feeds(author_id)
+    changes = Counter(dict.fromkeys(names + (followers or []), len(posts)))
+    changes.update({
+        counts.group_feed(group_id): total
+        for group_id, total in groups.items()
+    })
+    names += [counts.group_feed(group_id) for group_id in groups]
+    by_group = {}
+    for post in posts:
+        if post.group_id:
+            by_group.setdefault(post.group_id, []).append(post)
+
+    def apply():
+        shift(changes, followers)
+        fragments.bump(names)
+        for group_id, grouped in by_group.items():
+            summaries.add_posts(group_id, grouped)
+
+    transaction.on_commit(apply)
+
+
+def post_edited(post, old_group_id):
+    """Правка поста; при смене группы меняются счетчики обеих групп."""
+    names = post_feeds(post, post.group_id)
+    moved = old_group_id != post.group_id
+    changes = Counter()
+    if moved and old_group_id:
+        names.append(counts.group_feed(old_group_id))
+        changes[counts.group_feed(old_group_id)] -= 1
+    if moved and post.group_id:
+        changes[counts.group_feed(post.group_id)] += 1
+
+    def apply():
+        shift(changes)
+        fragments.bump(names)
+        if moved:
+            summaries.forget_groups([old_group_id, post.group_id])
+
+    transaction.on_commit(apply)
+
+
+def post_deleted(post):
+    names = post_feeds(post, post.group_id)
+    followers = follower_feeds(post.author_id)
+    changes = Counter(dict.fromkeys(names + (followers or []), -1))
+    group_id = post.group_id
+
+    def apply():
+        shift(changes, followers)
+        fragments.bump(names)
+        summaries.forget_groups([group_id])
+
+    transaction.on_commit(apply)
+
+
+def comments_changed(posts):
+    """Новые, измененные или удаленные комментарии к постам."""
+    names = set()
+    for post in posts:
+        names.update(post_feeds(post, post.group_id))
+    transaction.on_commit(lambda: fragments.bump(sorted(names)))
+
+
+def follows_changed(user_id, author_ids):
+    """Подписки user_id на авторов созданы или удалены."""
+    def apply():
+        counts.forget_counts([counts.follow_feed(user_id)])
+        fragments.bump([counts.follow_feed(user_id)] + [
+            fragments.followers(author_id) for author_id in author_ids
+        ])
+
+    transaction.on_commit(apply)
+
+
+def group_changed(group):
+    """Группа создана, изменена или удалена."""
+    names = [fragments.GLOBAL, counts.group_feed(group.pk)]
+    slugs = [group.slug, getattr(group, '_old_slug', None)]
+
+    def apply():
+        fragments.bump(names)
+        summaries.forget(slugs)
+
+    transaction.on_commit(apply)
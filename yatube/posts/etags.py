@@ -0,0 +1,99 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+from core import replica
+
+from . import counts, fragments, summaries, watermarks
+from .models import Post
+
+User = get_user_model()
+
+
+def make_etag(request, names):
+    """ETag страницы из версий лент, от которых зависит ее содержимое.
+
+    Кроме версий в тег входят адрес с параметрами, пользователь, язык
+    и CSRF-кука: от них зависят шапка и формы на странице.
+    """
+    parts = (
+        request.get_full_path(),
+        str(request.user.pk),
+        get_language(),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        *fragments.versions(names),
+    )
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def conditional(page_feeds):
+    """condition() с ETag и Last-Modified по лентам страницы.
+
+    page_feeds(request, *args, **kwargs) возвращает имена лент или None,
+    если объекта страницы нет; тогда проверки пропускаются и вьюха
+    сама отвечает 404. Страница с отстающей реплики валидаторов не
+    получает: иначе браузер держал бы ее и после догона реплики.
+    """
+    def names(request, *args, **kwargs):
+        if replica.is_reading():
+            return None
+        if not hasattr(request, '_page_feeds'):
+            request._page_feeds = page_feeds(request, *args, **kwargs)
+        return request._page_feeds
+
+    def etag(request, *args, **kwargs):
+        feeds = names(request, *args, **kwargs)
+        return None if feeds is None else make_etag(request, feeds)
+
+    def last_modified(request, *args, **kwargs):
+        feeds = names(request, *args, **kwargs)
+        return None if feeds is None else watermarks.last_modified(feeds)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def reader_feeds(request):
+    if request.user.is_authenticated:
+        return [counts.follow_feed(request.user.pk)]
+    return []
+
+
+def index_feeds(request):
+    return fragments.dependencies(counts.ALL_FEED)
+
+
+def group_feeds(request, slug):
+    # Сводка нужна и самой вьюхе: группа ищется один раз
+    group = summaries.get(slug)
+    if group is None:
+        return None
+    return fragments.dependencies(counts.group_feed(group.id))
+
+
+def profile_feeds(request, username):
+    # Автор нужен и самой вьюхе: он ищется один раз
+    author = User.objects.filter(username=username).first()
+    request._page_author = author
+    if author is None:
+        return None
+    return [
+        *fragments.dependencies(counts.author_feed(author.pk)),
+        fragments.followers(author.pk),
+        *reader_feeds(request),
+    ]
+
+
+def post_feeds(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if post is None:
+        return None
+    author_id, group_id = post
+    names = [*fragments.dependencies(counts.author_feed(author_id))]
+    if group_id:
+        names.append(counts.group_feed(group_id))
+    return names
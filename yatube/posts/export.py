@@ -0,0 +1,147 @@
+import csv
+import gzip
+import io
+import json
+import os
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max, Min
+
+from .models import Comment, Follow, Group, Post
+
+CHUNK_SIZE = 5000
+GZIP_LEVEL = 6
+FORMATS = ('ndjson', 'csv')
+MANIFEST = '.export.json'
+
+# Имя выгрузки -> модель и колонки; первая колонка — id
+EXPORTS = {
+    'groups': (Group, ('id', 'title', 'slug', 'description', 'updated_at')),
+    'posts': (Post, (
+        'id', 'author_id', 'group_id', 'text', 'image', 'pub_date',
+        'updated_at',
+    )),
+    'comments': (Comment, (
+        'id', 'post_id', 'author_id', 'text', 'pub_date', 'updated_at',
+    )),
+    'follows': (Follow, ('id', 'user_id', 'author_id')),
+}
+
+
+def encode(fmt, columns, rows, header=False):
+    """Строки выгрузки в байтах: NDJSON или CSV с заголовком."""
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(columns)
+        writer.writerows(rows)
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            buffer.write(encoder.encode(dict(zip(columns, row))))
+            buffer.write('\n')
+    return buffer.getvalue().encode('utf-8')
+
+
+def plan(names, parts, fmt, compress, database=DEFAULT_DB_ALIAS):
+    """Делит таблицы на parts диапазонов id, по файлу на диапазон.
+
+    Граница сверху фиксируется сейчас: строки, добавленные во время
+    выгрузки, в нее не попадут.
+    """
+    extension = fmt + ('.gz' if compress else '')
+    planned = []
+    for name in names:
+        model, _ = EXPORTS[name]
+        bounds = model.objects.using(database).aggregate(
+            low=Min('pk'), high=Max('pk')
+        )
+        low = (bounds['low'] or 1) - 1
+        high = bounds['high'] or 0
+        step = -(-(high - low) // parts) or 1
+        for index, start in enumerate(range(low, max(high, low + 1), step)):
+            suffix = f'.{index}' if parts > 1 else ''
+            planned.append({
+                'name': name,
+                'file': f'{name}{suffix}.{extension}',
+                'low': start,
+                'high': min(start + step, high),
+            })
+    return planned
+
+
+def checkpoint_path(path):
+    return path + '.checkpoint'
+
+
+def load_checkpoint(path, part):
+    try:
+        with open(checkpoint_path(path)) as checkpoint:
+            return json.load(checkpoint)
+    except FileNotFoundError:
+        return {'last_id': part['low'], 'size': 0, 'rows': 0}
+
+
+def save_checkpoint(path, state):
+    # Через временный файл: прерванная запись не портит точку
+    target = checkpoint_path(path)
+    with open(target + '.tmp', 'w') as checkpoint:
+        json.dump(state, checkpoint)
+    os.replace(target + '.tmp', target)
+
+
+def chunks(queryset, columns, last_id, high, chunk_size):
+    """Строки диапазона (last_id, high] пачками по возрастанию id.
+
+    Каждая пачка — отдельный запрос с поиском по индексу: ни курсор,
+    ни транзакция чтения не держатся открытыми всю выгрузку.
+    """
+    while last_id < high:
+        rows = list(queryset.filter(
+            pk__gt=last_id, pk__lte=high
+        ).order_by('pk').values_list(*columns)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def export_part(directory, part, fmt, compress, chunk_size=CHUNK_SIZE,
+                database=DEFAULT_DB_ALIAS):
+    """Выгружает диапазон в файл; продолжает с контрольной точки.
+
+    Файл обрезается до размера из точки, так что недописанный после
+    сбоя хвост отбрасывается. Со сжатием каждая пачка — отдельный
+    член gzip: их последовательность читается как один поток.
+    Возвращает число строк в файле.
+    """
+    model, columns = EXPORTS[part['name']]
+    path = os.path.join(directory, part['file'])
+    state = load_checkpoint(path, part)
+    queryset = model.objects.using(database)
+    with open(path, 'ab') as output:
+        output.truncate(state['size'])
+        header = fmt == 'csv' and state['size'] == 0
+        for rows in chunks(
+            queryset, columns, state['last_id'], part['high'], chunk_size
+        ):
+            data = encode(fmt, columns, rows, header)
+            header = False
+            if compress:
+                data = gzip.compress(data, GZIP_LEVEL)
+            output.write(data)
+            output.flush()
+            os.fsync(output.fileno())
+            state['last_id'] = rows[-1][0]
+            state['size'] = output.tell()
+            state['rows'] += len(rows)
+            save_checkpoint(path, state)
+        if header:
+            # Пустая таблица: в CSV остается хотя бы заголовок
+            data = encode(fmt, columns, [], header)
+            output.write(gzip.compress(data, GZIP_LEVEL) if compress else data)
+            state['size'] = output.tell()
+    save_checkpoint(path, state)
+    return state['rows']
@@ -0,0 +1,304 @@
+import heapq
+import itertools
+import logging
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import OuterRef, Subquery
+
+from . import counts, fragments, stats
+from .common import paginator
+from .models import Follow, Post, TimelineEntry, UserStats
+
+TIMELINE_KEYS = ('pub_date', 'post_id')
+METRICS_KEY = 'posts:feed_path:{path}'
+# Пути, которыми может быть собрана лента подписок
+JOIN, PUSH, PULL, HYBRID = 'join', 'push', 'pull', 'hybrid'
+FEED_PATHS = (JOIN, PUSH, PULL, HYBRID)
+
+FeedItem = namedtuple('FeedItem', ('pub_date', 'post_id'))
+logger = logging.getLogger(__name__)
+
+
+def timeline_feed(user_id):
+    return f'timeline:{user_id}'
+
+
+def is_enabled():
+    return settings.FEED_FANOUT
+
+
+def _entries(user_ids, posts):
+    return [
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in user_ids
+        for post in posts
+    ]
+
+
+def trim(user_ids):
+    """Оставляет в лентах только FEED_TIMELINE_LENGTH свежих записей."""
+    newest = TimelineEntry.objects.filter(
+        user_id=OuterRef('user_id')
+    ).order_by('-pub_date', '-post_id').values('pk')
+    TimelineEntry.objects.filter(user_id__in=user_ids).exclude(
+        pk__in=Subquery(newest[:settings.FEED_TIMELINE_LENGTH])
+    ).delete()
+
+
+def forget(user_ids):
+    """Сбрасывает счетчики и фрагменты лент после записи в TimelineEntry.
+
+    Задачи очереди пишут ленты позже, чем изменился пост или подписка,
+    и читатель мог успеть закешировать страницу без новой записи.
+    """
+    counts.forget_counts([timeline_feed(user_id) for user_id in user_ids])
+    user_ids = list(user_ids)
+    step = settings.FEED_FANOUT_BATCH
+    for start in range(0, len(user_ids), step):
+        fragments.bump([
+            counts.follow_feed(user_id)
+            for user_id in user_ids[start:start + step]
+        ])
+
+
+def follower_counts(author_ids):
+    """Число подписчиков авторов из денормализованных счетчиков."""
+    found = stats.get_many(UserStats, stats.USER_COUNTERS, list(author_ids))
+    return {pk: found[pk].followers_count for pk in found}
+
+
+def is_celebrity(followers_count):
+    return followers_count >= settings.FEED_CELEBRITY_THRESHOLD
+
+
+def celebrities(author_ids):
+    """Авторы, чьи посты собираются при чтении, а не раскладываются."""
+    return [
+        author_id
+        for author_id, total in follower_counts(author_ids).items()
+        if is_celebrity(total)
+    ]
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if celebrities([post.author_id]):
+        return
+    followers = list(Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True))
+    if not followers:
+        return
+    TimelineEntry.objects.bulk_create(
+        _entries(followers, [post]),
+        batch_size=settings.FEED_FANOUT_BATCH,
+        ignore_conflicts=True,
+    )
+    trim(followers)
+    forget(followers)
+
+
+def _fill(user_id, author_ids):
+    """Кладет в ленту последние посты авторов, кроме знаменитостей."""
+    skipped = set(celebrities(author_ids))
+    for author_id in author_ids:
+        if author_id in skipped:
+            continue
+        posts = Post.objects.filter(author_id=author_id).only(
+            'pk', 'author_id', 'pub_date'
+        )[:settings.FEED_TIMELINE_LENGTH]
+        TimelineEntry.objects.bulk_create(
+            _entries([user_id], posts),
+            batch_size=settings.FEED_FANOUT_BATCH,
+            ignore_conflicts=True,
+        )
+
+
+def backfill(user_id, author_id):
+    """Заполняет ленту последними постами нового автора в подписках."""
+    _fill(user_id, [author_id])
+    trim([user_id])
+    forget([user_id])
+
+
+def purge(user_id, author_id):
+    """Убирает из ленты посты автора, от которого отписались."""
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        author_id=author_id,
+    ).delete()
+    forget([user_id])
+
+
+def left_celebrities(author_id):
+    """Автор только что опустился ниже порога «звезды»."""
+    total = follower_counts([author_id]).get(author_id)
+    return total == settings.FEED_CELEBRITY_THRESHOLD - 1
+
+
+def demote(author_id):
+    """Раскладывает посты бывшей «звезды» по лентам подписчиков.
+
+    Пока автор был выше порога, его посты не раскладывались и
+    подмешивались при чтении; без этого они пропали бы из лент.
+    Уже разложенные записи пропускаются.
+    """
+    if celebrities([author_id]):
+        return
+    followers = list(Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True))
+    posts = list(Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date'
+    )[:settings.FEED_TIMELINE_LENGTH])
+    if not followers or not posts:
+        return
+    step = max(settings.FEED_FANOUT_BATCH // len(posts), 1)
+    for start in range(0, len(followers), step):
+        TimelineEntry.objects.bulk_create(
+            _entries(followers[start:start + step], posts),
+            batch_size=settings.FEED_FANOUT_BATCH,
+            ignore_conflicts=True,
+        )
+    trim(followers)
+    forget(followers)
+
+
+def rebuild(user_id):
+    """Пересобирает ленту читателя с нуля по текущим подпискам."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    authors = Follow.objects.filter(
+        user_id=user_id
+    ).values_list('author_id', flat=True)
+    # Обрезка одна на всю ленту, а не после каждого автора
+    _fill(user_id, list(authors))
+    trim([user_id])
+    forget([user_id])
+
+
+def timeline(user):
+    return TimelineEntry.objects.filter(user=user).only(
+        'post_id', 'pub_date'
+    )
+
+
+class HybridFeed:
+    """Лента подписок: материализованная часть плюс посты «звезд».
+
+    Посты обычных авторов читаются из TimelineEntry, посты авторов
+    с числом подписчиков не меньше FEED_CELEBRITY_THRESHOLD — прямо
+    из Post; потоки сливаются k-way merge по (pub_date, id).
+    Записи «звезд», разложенные до того, как они перешли порог,
+    из материализованной части исключаются: потоки не пересекаются,
+    и count() со срезами не считают пост дважды.
+    Поддерживает count() и срезы, поэтому подходит для Paginator.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        # Подписки и счетчики подписчиков авторов одним запросом
+        followed = dict(Follow.objects.filter(user=user).values_list(
+            'author_id', 'author__stats__followers_count'
+        ))
+        missing = [pk for pk, total in followed.items() if total is None]
+        followed.update(follower_counts(missing))
+        self.followed = list(followed)
+        self.celebrities = [
+            pk for pk, total in followed.items() if is_celebrity(total)
+        ]
+
+    @property
+    def path(self):
+        if not self.celebrities:
+            return PUSH
+        if len(self.celebrities) == len(self.followed):
+            return PULL
+        return HYBRID
+
+    def count(self):
+        total = counts.get_feed_count(
+            timeline_feed(self.user.pk), timeline(self.user)
+        )
+        if self.celebrities:
+            total -= timeline(self.user).filter(
+                author_id__in=self.celebrities
+            ).count()
+        for author_id in self.celebrities:
+            total += counts.get_feed_count(
+                counts.author_feed(author_id),
+                Post.objects.filter(author_id=author_id),
+            )
+        return total
+
+    def _streams(self, limit):
+        yield TimelineEntry.objects.filter(user=self.user).exclude(
+            author_id__in=self.celebrities
+        ).order_by(
+            '-pub_date', '-post_id'
+        ).values_list('pub_date', 'post_id')[:limit]
+        for author_id in self.celebrities:
+            yield Post.objects.filter(author_id=author_id).order_by(
+                '-pub_date', '-pk'
+            ).values_list('pub_date', 'pk')[:limit]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        streams = [
+            [FeedItem(*row) for row in stream]
+            for stream in self._streams(index.stop)
+        ]
+        merged = list(itertools.islice(
+            heapq.merge(*streams, reverse=True), index.stop
+        ))
+        return merged[index]
+
+
+def record_path(path):
+    """Считает, каким путем собрана лента подписок."""
+    try:
+        cache.incr(METRICS_KEY.format(path=path))
+    except ValueError:
+        cache.add(METRICS_KEY.format(path=path), 1, None)
+    logger.debug('follow feed served via %s', path)
+
+
+def feed_metrics():
+    keys = {path: METRICS_KEY.format(path=path) for path in FEED_PATHS}
+    cached = cache.get_many(keys.values())
+    return {path: cached.get(key, 0) for path, key in keys.items()}
+
+
+def hydrate(page):
+    """Подменяет записи ленты постами, загруженными одним запросом."""
+    ids = [entry.post_id for entry in page.object_list]
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    page.object_list = [posts[pk] for pk in ids if pk in posts]
+    return page
+
+
+def follow_page(request, per_page):
+    """Страница ленты подписок и путь, которым она собрана."""
+    feed = HybridFeed(request.user)
+    if feed.path == PUSH:
+        page_obj = paginator(
+            request,
+            timeline(request.user),
+            per_page,
+            timeline_feed(request.user.pk),
+            TIMELINE_KEYS,
+        )
+    else:
+        page_obj = Paginator(feed, per_page).get_page(
+            request.GET.get('page')
+        )
+    record_path(feed.path)
+    return hydrate(page_obj), feed.path
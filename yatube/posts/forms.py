@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import images
 from .models import Comment, Post
 
 
@@ -22,6 +24,18 @@ class PostForm(forms.ModelForm):
 
         return data
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # Нормализуется только новая загрузка, а не уже сохраненный файл
+        if isinstance(image, UploadedFile):
+            image, width, height = images.normalize(image)
+            self.instance.image_width = width
+            self.instance.image_height = height
+        elif not image:
+            self.instance.image_width = None
+            self.instance.image_height = None
+        return image
+
 
 class CommentForm(forms.ModelForm):
 
@@ -0,0 +1,86 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import replica
+
+from . import counts, watermarks
+
+VERSION_KEY = 'posts:version:{feed}'
+# Версия, общая для всех лент: меняется вместе с группами,
+# названия и ссылки которых выводятся в списках постов
+GLOBAL = 'global'
+# Время жизни фрагмента списка постов, секунды
+TIMEOUT = 60 * 60
+
+
+def followers(author_id):
+    """Версия подписчиков автора: их число выводится в профиле."""
+    return f'followers:{author_id}'
+
+
+def _initial_version():
+    # Версия после вытеснения ключа не должна совпасть со старой,
+    # поэтому отсчет начинается с текущего времени, а не с единицы.
+    return int(time.time() * 1000)
+
+
+def versions(names):
+    keys = [VERSION_KEY.format(feed=name) for name in names]
+    found = cache.get_many(keys)
+    result = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial_version(), None)
+            found[key] = cache.get(key)
+        result.append(str(found[key]))
+    return result
+
+
+def bump(names):
+    """Инвалидирует фрагменты лент, увеличивая их версии.
+
+    Заодно обновляет отметки времени изменения лент.
+    """
+    watermarks.touch(names)
+    for name in names:
+        key = VERSION_KEY.format(feed=name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), None)
+
+
+def dependencies(feed):
+    """Версии, от которых зависит фрагмент ленты."""
+    if feed.startswith('follow:'):
+        # Лента подписок меняется с любым постом и с подписками читателя
+        return (feed, counts.ALL_FEED, GLOBAL)
+    return (feed, GLOBAL)
+
+
+def timeout():
+    """Время жизни для тега {% cache %} текущего запроса.
+
+    Фрагмент, собранный с отстающей реплики, не кешируется: под
+    текущей версией его получил бы и автор, закрепленный за основной
+    базой, и он пережил бы синхронизацию реплики. Готовые фрагменты
+    из кеша читаются и такими запросами.
+    """
+    return 0 if replica.is_reading() else TIMEOUT
+
+
+def key(request, feed):
+    """Ключ фрагмента списка постов: лента, версии и страница."""
+    cursor = request.GET.get('cursor')
+    if cursor is None:
+        position = 'p' + (request.GET.get('page') or '1')
+    else:
+        position = 'c' + cursor
+    return ':'.join((
+        feed,
+        *versions(dependencies(feed)),
+        settings.POSTS_PAGINATION,
+        position,
+    ))
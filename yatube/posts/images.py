@@ -0,0 +1,63 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from PIL import Image, ImageOps
+
+OPAQUE = 255
+
+
+def has_transparency(image):
+    if image.mode == 'P':
+        return 'transparency' in image.info
+    if image.mode in ('RGBA', 'LA'):
+        return image.getchannel('A').getextrema()[0] < OPAQUE
+    return False
+
+
+def is_animated(image):
+    return getattr(image, 'is_animated', False)
+
+
+def normalize(upload):
+    """Готовит загруженную картинку к хранению.
+
+    Поворачивает по EXIF, уменьшает до POST_IMAGE_MAX_DIMENSION по
+    большей стороне и перекодирует без метаданных: в JPEG, а картинки
+    с прозрачностью — в PNG. Анимированные GIF сохраняются как есть.
+    Возвращает (файл, ширина, высота).
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    if is_animated(image):
+        upload.seek(0)
+        return upload, image.width, image.height
+
+    limit = settings.POST_IMAGE_MAX_DIMENSION
+    # JPEG декодируется сразу в уменьшенном масштабе
+    image.draft('RGB', (limit, limit))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((limit, limit), Image.LANCZOS)
+
+    buffer = BytesIO()
+    if has_transparency(image):
+        image = image.convert('RGBA')
+        image.save(buffer, 'PNG', optimize=True)
+        extension, content_type = '.png', 'image/png'
+    else:
+        image = image.convert('RGB')
+        image.save(
+            buffer,
+            'JPEG',
+            quality=settings.POST_IMAGE_JPEG_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+        extension, content_type = '.jpg', 'image/jpeg'
+
+    name = os.path.splitext(os.path.basename(upload.name))[0] + extension
+    normalized = InMemoryUploadedFile(
+        buffer, 'image', name, content_type, buffer.tell(), None,
+    )
+    return normalized, image.width, image.height
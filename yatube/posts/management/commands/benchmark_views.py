@@ -0,0 +1,147 @@
+import random
+import statistics
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+from django.test import Client, modify_settings
+from django.urls import reverse
+
+from core.middleware import QueryRecorder
+from core.testing import percentile, throwaway_cache
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+REQUESTS = 50
+READERS = 10
+PERCENTILES = (50, 95, 99)
+
+
+def sample(queryset, rng):
+    """Случайная строка поиском по диапазону id, без ORDER BY RANDOM()."""
+    bounds = queryset.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return None
+    pivot = rng.randint(bounds['low'], bounds['high'])
+    return queryset.filter(pk__gte=pivot).order_by('pk').first()
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает главные страницы через тестовый клиент и выводит '
+        'перцентили задержки и число SQL-запросов на запрос'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=REQUESTS,
+            help='Сколько запросов сделать к каждой странице',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help=(
+                'Сбрасывать кеш перед каждым запросом; замер идет '
+                'в отдельном локальном кеше, общий не очищается'
+            ),
+        )
+        parser.add_argument('--random-seed', type=int, default=0)
+
+    def scenarios(self, rng):
+        """Страница -> функция, выдающая случайный URL этой страницы."""
+        def post():
+            return sample(Post.objects.all(), rng)
+
+        def grouped():
+            return sample(Post.objects.exclude(group=None), rng)
+
+        if post() is None or grouped() is None:
+            raise CommandError(
+                'Нужны посты с группами: заполните базу manage.py seed'
+            )
+        return {
+            'posts:main_page': lambda: reverse('posts:main_page'),
+            'posts:posts_by_groups': lambda: reverse(
+                'posts:posts_by_groups',
+                kwargs={'slug': grouped().group.slug},
+            ),
+            'posts:profile': lambda: reverse(
+                'posts:profile', kwargs={'username': post().author.username},
+            ),
+            'posts:post_detail': lambda: reverse(
+                'posts:post_detail', kwargs={'post_id': post().pk},
+            ),
+            'posts:follow_index': lambda: reverse('posts:follow_index'),
+        }
+
+    def clients(self, rng):
+        """Залогиненные клиенты нескольких читателей с подписками."""
+        clients = []
+        for _ in range(READERS):
+            follow = sample(Follow.objects.all(), rng)
+            if follow is None:
+                raise CommandError('Нужны подписки: запустите manage.py seed')
+            client = Client()
+            client.force_login(follow.user)
+            clients.append(client)
+        return clients
+
+    def measure(self, client, url):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            start = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - start
+        return response.status_code, elapsed, recorder.count
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['random_seed'])
+        results = {}
+        # Запросы считаются здесь, предупреждения middleware не нужны
+        with ExitStack() as stack:
+            stack.enter_context(modify_settings(
+                ALLOWED_HOSTS={'append': 'testserver'},
+                MIDDLEWARE={'remove': 'core.middleware.QueryCountMiddleware'},
+            ))
+            if options['cold']:
+                stack.enter_context(throwaway_cache())
+            scenarios = self.scenarios(rng)
+            clients = self.clients(rng)
+            for view, url in scenarios.items():
+                # Прогрев: первые запросы досчитывают ленивые счетчики
+                self.measure(clients[0], url())
+                results[view] = []
+                for _ in range(options['requests']):
+                    target = url()
+                    if options['cold']:
+                        cache.clear()
+                    results[view].append(
+                        self.measure(rng.choice(clients), target)
+                    )
+
+        header = ''.join(f'{f"p{rank}, мс":>10}' for rank in PERCENTILES)
+        self.stdout.write(
+            f'{"вьюха":<24}{header}{"запросов":>10}{"макс":>6}{"ошибок":>8}'
+        )
+        for view, rows in results.items():
+            latencies = sorted(elapsed * 1000 for _, elapsed, _ in rows)
+            queries = [count for _, _, count in rows]
+            errors = sum(status != 200 for status, _, _ in rows)
+            columns = ''.join(
+                f'{percentile(latencies, rank):>10.1f}'
+                for rank in PERCENTILES
+            )
+            line = (
+                f'{view:<24}{columns}{statistics.mean(queries):>10.1f}'
+                f'{max(queries):>6}{errors:>8}'
+            )
+            self.stdout.write(self.style.ERROR(line) if errors else line)
@@ -0,0 +1,118 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from posts import seed
+from posts.models import Comment, Follow, Post
+
+REPEAT = 20
+# Составные индексы лент, которые сравниваются с их отсутствием
+FEED_INDEXES = (
+    'post_group_pub_date_idx',
+    'post_author_pub_date_idx',
+    'comment_post_pub_date_idx',
+    'follow_user_author_idx',
+)
+
+
+def busiest(queryset, field):
+    row = queryset.exclude(**{field: None}).values(field).annotate(
+        total=Count('pk')
+    ).order_by('-total').first()
+    return row and row[field]
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы EXPLAIN и время запросов лент без составных '
+        'индексов и с ними'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Сгенерировать столько постов (откатывается в конце)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=REPEAT,
+            help='Сколько раз выполнять каждый запрос',
+        )
+
+    def cases(self):
+        group_id = busiest(Post.objects, 'group')
+        author_id = busiest(Post.objects, 'author')
+        post_id = busiest(Comment.objects, 'post')
+        user_id = busiest(Follow.objects, 'user')
+        if None in (group_id, author_id, post_id, user_id):
+            raise CommandError(
+                'Нужны посты, группы, комментарии и подписки: '
+                'заполните базу или запустите с --seed'
+            )
+        return (
+            ('лента группы', Post.objects.filter(group_id=group_id)[:10]),
+            ('лента автора', Post.objects.filter(author_id=author_id)[:10]),
+            ('комментарии поста', Comment.objects.filter(
+                post_id=post_id
+            )[:50]),
+            ('лента подписок', Post.objects.filter(
+                author__following__user_id=user_id
+            )[:10]),
+            ('подписка в профиле', Follow.objects.filter(
+                user_id=user_id, author_id=author_id
+            )[:1]),
+        )
+
+    def measure(self, queryset):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    def report(self, title, cases):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        results = {}
+        for label, queryset in cases:
+            results[label] = self.measure(queryset)
+            self.stdout.write(f'{label}: {results[label]:.2f} мс')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
+        return results
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        with transaction.atomic():
+            if options['seed']:
+                count = options['seed']
+                seed.seed(
+                    users=max(count // 20, 10),
+                    groups=max(count // 500, 5),
+                    posts=count,
+                )
+            cases = self.cases()
+
+            savepoint = transaction.savepoint()
+            with connection.cursor() as cursor:
+                for name in FEED_INDEXES:
+                    cursor.execute(
+                        f'DROP INDEX {connection.ops.quote_name(name)}'
+                    )
+            before = self.report('Без составных индексов', cases)
+            transaction.savepoint_rollback(savepoint)
+
+            after = self.report('С составными индексами', cases)
+            self.stdout.write(self.style.MIGRATE_HEADING('Ускорение'))
+            for label, _ in cases:
+                self.stdout.write(
+                    f'{label}: {before[label] / after[label]:.1f}x'
+                )
+            # Сгенерированные данные и план эксперимента не сохраняются
+            transaction.set_rollback(True)
@@ -0,0 +1,98 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, modify_settings
+from django.urls import reverse
+
+from core.middleware import query_report, reset_report
+from core.testing import throwaway_cache
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет страницы ленты через тестовый клиент и сообщает, '
+        'какие из них вышли за бюджет SQL-запросов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Сколько раз запрашивать каждую страницу',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help=(
+                'Сбрасывать кеш перед каждым запросом; замер идет '
+                'в отдельном локальном кеше, общий не очищается'
+            ),
+        )
+
+    def urls(self):
+        post = Post.objects.order_by('-pub_date').first()
+        group = Group.objects.order_by('pk').first()
+        follow = Follow.objects.order_by('pk').first()
+        if post is None or group is None or follow is None:
+            raise CommandError('Нужны хотя бы один пост, группа и подписка')
+        return follow.user, (
+            reverse('posts:main_page'),
+            reverse('posts:posts_by_groups', kwargs={'slug': group.slug}),
+            reverse('posts:profile', kwargs={'username': follow.author}),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+            reverse('posts:follow_index'),
+        )
+
+    def handle(self, *args, **options):
+        user, urls = self.urls()
+        client = Client()
+        client.force_login(user)
+        with ExitStack() as stack:
+            if options['cold']:
+                stack.enter_context(throwaway_cache())
+            self.run(client, urls, options)
+        self.report()
+
+    def run(self, client, urls, options):
+        with modify_settings(
+            ALLOWED_HOSTS={'append': 'testserver'},
+            MIDDLEWARE={'prepend': 'core.middleware.QueryCountMiddleware'},
+        ):
+            # Прогрев: первый заход досчитывает ленивые счетчики в БД
+            for url in urls:
+                client.get(url)
+            reset_report()
+            for _ in range(options['repeat']):
+                for url in urls:
+                    if options['cold']:
+                        cache.clear()
+                    client.get(url)
+
+    def report(self):
+        over = 0
+        self.stdout.write(
+            f'{"вьюха":<24}{"запросов":>10}{"бюджет":>8}{"БД, мс":>10}'
+        )
+        for row in query_report():
+            if row['view'] not in settings.QUERY_BUDGETS:
+                continue
+            db_time = row['db_time'] / row['requests'] * 1000
+            line = (
+                f'{row["view"]:<24}{row["max_queries"]:>10}'
+                f'{row["budget"]:>8}{db_time:>10.1f}'
+            )
+            if row['over_budget']:
+                over += 1
+                self.stdout.write(self.style.ERROR(line + '  превышен'))
+            else:
+                self.stdout.write(line)
+
+        if over:
+            raise CommandError(f'Вьюх сверх бюджета: {over}')
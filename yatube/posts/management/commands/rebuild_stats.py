@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import stats
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает или сверяет денормализованные счетчики'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только сверить счетчики, ничего не меняя',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько объектов пересчитывать за раз',
+        )
+
+    def handle(self, *args, **options):
+        verify = options['verify']
+        batch_size = options['batch_size']
+        total_wrong = 0
+
+        for stats_model, owner, counters in stats.STATS:
+            wrong = 0
+            batch = []
+            pks = owner.objects.order_by('pk').values_list('pk', flat=True)
+            for pk in pks.iterator(chunk_size=batch_size):
+                batch.append(pk)
+                if len(batch) == batch_size:
+                    wrong += stats.rebuild(
+                        stats_model, counters, batch, verify
+                    )
+                    batch = []
+            if batch:
+                wrong += stats.rebuild(stats_model, counters, batch, verify)
+            total_wrong += wrong
+            self.stdout.write(
+                f'{stats_model.__name__}: расхождений {wrong}'
+            )
+
+        if verify and total_wrong:
+            raise CommandError(f'Всего расхождений: {total_wrong}')
@@ -0,0 +1,142 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import fragments, search
+from posts.models import Post
+
+BATCH_SIZE = 500
+CHECKPOINT = os.path.join(settings.BASE_DIR, '.reindex_search.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс постов и комментариев пачками, '
+        'с контрольными точками для продолжения после сбоя. Индекс '
+        'обновляется на месте: поиск работает все время перестройки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько постов индексировать за раз',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Процессов для разбора текстов; 0 — в этом процессе',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить с последней контрольной точки',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=CHECKPOINT,
+            help='Файл контрольной точки',
+        )
+
+    def load_state(self, options, backend):
+        if not options['resume']:
+            return {'backend': backend.name, 'last_pk': 0, 'indexed': 0}
+        try:
+            with open(options['checkpoint']) as checkpoint:
+                state = json.load(checkpoint)
+        except FileNotFoundError:
+            raise CommandError('Нет контрольной точки для продолжения')
+        if state['backend'] != backend.name:
+            raise CommandError(
+                f'Контрольная точка записана для индекса {state["backend"]}'
+            )
+        return state
+
+    def save_state(self, path, state):
+        # Через временный файл: прерванная запись не портит точку
+        with open(path + '.tmp', 'w') as checkpoint:
+            json.dump(state, checkpoint)
+        os.replace(path + '.tmp', path)
+
+    def batches(self, last_pk, batch_size):
+        """id постов пачками по возрастанию, без загрузки всей таблицы."""
+        while True:
+            ids = list(Post.objects.filter(pk__gt=last_pk).order_by(
+                'pk'
+            ).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return
+            yield ids
+            last_pk = ids[-1]
+
+    def prepared(self, backend, batches, processes):
+        """Готовые пачки в исходном порядке; в работе не больше 2N пачек."""
+        if not processes:
+            for ids in batches:
+                yield search.prepare_batch(backend.name, ids)
+            return
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        ) as pool:
+            pending = deque()
+            for ids in batches:
+                pending.append(
+                    pool.submit(search.prepare_batch, backend.name, ids)
+                )
+                if len(pending) >= processes * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        state = self.load_state(options, backend)
+        total = state['indexed'] + Post.objects.filter(
+            pk__gt=state['last_pk']
+        ).count()
+
+        started = time.monotonic()
+        indexed_now = 0
+        batches = self.batches(state['last_pk'], options['batch_size'])
+        for ids, rows in self.prepared(
+            backend, batches, options['processes']
+        ):
+            # Запись — в одном процессе: SQLite не любит параллельных
+            # писателей, а разбор текстов уже сделан в пуле
+            with transaction.atomic():
+                backend.write(ids, rows)
+            state['last_pk'] = ids[-1]
+            state['indexed'] += len(ids)
+            indexed_now += len(ids)
+            self.save_state(options['checkpoint'], state)
+            rate = indexed_now / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f'{state["indexed"]}/{total} постов, {rate:.0f} док/с'
+            )
+
+        # Строки пачки заменялись целиком; остались только строки
+        # постов, удаленных в обход сигналов
+        with transaction.atomic():
+            orphans = backend.delete_orphans()
+        fragments.bump([search.INDEX_VERSION])
+        if os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс {backend.name}: {state["indexed"]} постов '
+            f'за {elapsed:.1f} с '
+            f'({indexed_now / max(elapsed, 1e-6):.0f} док/с), '
+            f'удалено лишних: {orphans}'
+        ))
@@ -0,0 +1,91 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import feeds, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует пользователей, группы, посты, комментарии и подписки '
+        'с перекосом как в живой соцсети и пересобирает производные данные'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20_000)
+        parser.add_argument(
+            '--comments',
+            type=float,
+            default=2,
+            help='Среднее число комментариев на пост',
+        )
+        parser.add_argument(
+            '--follows',
+            type=float,
+            default=20,
+            help='Среднее число подписок на пользователя',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней до сегодня раскидать посты',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=seed.BATCH_SIZE,
+        )
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument(
+            '--processes',
+            type=int,
+            help='Процессов для переиндексации поиска, 0 — без пула',
+        )
+        parser.add_argument(
+            '--no-rebuild',
+            action='store_true',
+            help='Не пересобирать счетчики, ленты и поисковый индекс',
+        )
+
+    def progress(self, model, done):
+        self.stdout.write(f'{model._meta.label}: {done}')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            seed.seed(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows=options['follows'],
+                days=options['days'],
+                batch_size=options['batch_size'],
+                random_seed=options['random_seed'],
+                progress=self.progress,
+            )
+        self.stdout.write(
+            f'Данные вставлены за {time.monotonic() - started:.1f} с'
+        )
+
+        if not options['no_rebuild']:
+            # bulk_create обходит сигналы: все, что они поддерживают,
+            # собирается заново штатными командами
+            call_command('rebuild_stats', stdout=self.stdout)
+            # Ленты подписок читаются из таблицы, только если включена
+            # раскладка постов
+            if feeds.is_enabled():
+                call_command('rebuild_timelines', stdout=self.stdout)
+            reindex = {}
+            if options['processes'] is not None:
+                reindex['processes'] = options['processes']
+            call_command('reindex_search', stdout=self.stdout, **reindex)
+        seed.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.testing import percentile
+
+DURATION = 5
+WRITERS = 4
+READERS = 4
+# Время на запуск процессов, чтобы все начали нагрузку одновременно
+STARTUP = 3
+
+
+def setup(tuned, path):
+    """Инициализатор процесса: Django с нужным бэкендом и копией БД."""
+    os.environ['YATUBE_DB_NAME'] = path
+    os.environ['YATUBE_SQLITE_TUNING'] = '1' if tuned else '0'
+    os.environ.pop('YATUBE_DB_CONN_MAX_AGE', None)
+    django.setup()
+
+
+def run(role, start_at, duration):
+    """Нагружает БД как запросы add_comment или главной страницы.
+
+    После каждой операции соединение закрывается так же, как в конце
+    запроса: при CONN_MAX_AGE = 0 следующая откроет его заново.
+    """
+    from django.db import OperationalError, close_old_connections
+
+    from posts.models import Comment, Post
+
+    post = Post.objects.order_by('-pk').first()
+    close_old_connections()
+    time.sleep(max(start_at - time.time(), 0))
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == 'write':
+                Comment.objects.create(
+                    post_id=post.pk, author_id=post.author_id, text='Нагрузка'
+                )
+            else:
+                list(Post.objects.select_related('author', 'group')[:10])
+        except OperationalError:
+            errors += 1
+        else:
+            latencies.append(time.perf_counter() - start)
+        close_old_connections()
+    return role, latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность писателей и читателей SQLite '
+        'со штатным бэкендом и с core.db.backends.sqlite3'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=WRITERS)
+        parser.add_argument('--readers', type=int, default=READERS)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=DURATION,
+            help='Секунд нагрузки на каждый вариант',
+        )
+
+    def snapshot(self, directory, name):
+        """Копия текущей БД через backup API: с учетом WAL."""
+        path = os.path.join(directory, f'{name}.sqlite3')
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        target = sqlite3.connect(path)
+        with target:
+            source.backup(target)
+        # Штатный вариант должен стартовать с журналом отката
+        target.execute('PRAGMA journal_mode = delete')
+        source.close()
+        target.close()
+        return path
+
+    def measure(self, tuned, path, options):
+        roles = ['write'] * options['writers'] + ['read'] * options['readers']
+        start_at = time.time() + STARTUP
+        with ProcessPoolExecutor(
+            max_workers=len(roles),
+            mp_context=get_context('spawn'),
+            initializer=setup,
+            initargs=(tuned, path),
+        ) as pool:
+            futures = [
+                pool.submit(run, role, start_at, options['duration'])
+                for role in roles
+            ]
+            results = [future.result() for future in futures]
+        summary = {}
+        for role in ('write', 'read'):
+            latencies = sorted(
+                elapsed * 1000
+                for kind, rows, _ in results if kind == role
+                for elapsed in rows
+            )
+            summary[role] = (
+                len(latencies) / options['duration'],
+                percentile(latencies, 95) if latencies else 0,
+                sum(errors for kind, _, errors in results if kind == role),
+            )
+        return summary
+
+    def handle(self, *args, **options):
+        if settings.DATABASES['default']['ENGINE'].split('.')[-1] != 'sqlite3':
+            raise CommandError('Бенчмарк рассчитан на SQLite')
+        self.stdout.write(
+            f'{"вариант":<12}{"операция":<10}{"в секунду":>11}'
+            f'{"p95, мс":>9}{"ошибок":>8}'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name, tuned in (('штатный', False), ('настроенный', True)):
+                path = self.snapshot(directory, name)
+                for role, (rate, p95, errors) in self.measure(
+                    tuned, path, options
+                ).items():
+                    self.stdout.write(
+                        f'{name:<12}{role:<10}{rate:>11.0f}'
+                        f'{p95:>9.1f}{errors:>8}'
+                    )
@@ -0,0 +1,68 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:20
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+def build_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if fts5_available(connection):
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(text, "
+            f"tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, text FROM posts_post'
+        )
+        return
+    Post = apps.get_model('posts', 'Post')
+    SearchToken = apps.get_model('posts', 'SearchToken')
+    for post in Post.objects.only('pk', 'text').iterator():
+        words = re.findall(r'\w+', post.text.lower())
+        SearchToken.objects.bulk_create(
+            SearchToken(post_id=post.pk, term=term[:100], count=total)
+            for term, total in Counter(words).items()
+        )
+
+
+def drop_index(apps, schema_editor):
+    if fts5_available(schema_editor.connection):
+        schema_editor.execute(f'DROP TABLE {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_auto_20261018_0618'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, verbose_name='Слово')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchtoken',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_token'),
+        ),
+        migrations.RunPython(build_index, drop_index),
+    ]
@@ -0,0 +1,66 @@
+import re
+from collections import Counter
+
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+def create_table(schema_editor, columns):
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({columns}, "
+        f"tokenize='unicode61')"
+    )
+
+
+def add_comments(apps, schema_editor):
+    if fts5_available(schema_editor.connection):
+        create_table(schema_editor, 'text, comments')
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text, comments) '
+            f'SELECT post.id, post.text, ('
+            f'SELECT group_concat(comment.text, char(10)) '
+            f'FROM posts_comment comment WHERE comment.post_id = post.id'
+            f') FROM posts_post post'
+        )
+        return
+    SearchToken = apps.get_model('posts', 'SearchToken')
+    Comment = apps.get_model('posts', 'Comment')
+    for comment in Comment.objects.exclude(post=None).iterator():
+        words = Counter(re.findall(r'\w+', comment.text.lower()))
+        for term, total in words.items():
+            token, _ = SearchToken.objects.get_or_create(
+                post_id=comment.post_id, term=term[:100],
+                defaults={'count': 0},
+            )
+            token.count += total
+            token.save()
+
+
+def remove_comments(apps, schema_editor):
+    if fts5_available(schema_editor.connection):
+        create_table(schema_editor, 'text')
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, text FROM posts_post'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_comments, remove_comments),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:25
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def updated_from_pub_date(apps, schema_editor):
+    # Существующие посты и комментарии считаются не менявшимися
+    # с публикации
+    for name in ('Post', 'Comment'):
+        apps.get_model('posts', name).objects.update(updated_at=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_search_comments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedWatermark',
+            fields=[
+                ('feed', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Лента')),
+                ('changed_at', models.DateTimeField(verbose_name='Изменена')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(updated_from_pub_date, migrations.RunPython.noop),
+    ]
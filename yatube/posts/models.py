@@ -1,4 +1,5 @@
 from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
@@ -10,6 +11,11 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     description = models.TextField()
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     def __str__(self):
         return self.title
@@ -42,11 +48,34 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    # Размеры сохраненной картинки, чтобы не открывать файл ради них
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        null=True,
+        blank=True,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        null=True,
+        blank=True,
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        # Ленты группы и автора: фильтр по ключу и сортировка по дате
+        indexes = [
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_pub_date_idx',
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -79,6 +108,12 @@ class Comment(CreatedModel):
     class Meta:
         ordering = ('-pub_date',)
         default_related_name = 'comments'
+        indexes = [
+            models.Index(
+                fields=['post', '-pub_date'],
+                name='comment_post_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -106,3 +141,120 @@ class Follow(models.Model):
                 name='unique_followers'
             )
         ]
+        # Уникальный индекс начинается с автора; подписки читателя
+        # (лента подписок, кнопка в профиле) ищутся по user
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='follow_user_author_idx',
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок (fan-out on write)."""
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE,
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='+',
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-post_id')
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'],
+                name='timeline_user_pub_date_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            )
+        ]
+
+
+class UserStats(models.Model):
+    """Денормализованные счетчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+
+class GroupStats(models.Model):
+    """Денормализованные счетчики группы."""
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        verbose_name='Группа',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+
+
+class PostStats(models.Model):
+    """Денормализованные счетчики поста."""
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+    )
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+
+class SearchToken(models.Model):
+    """Запись обратного индекса поиска: слово, пост и число вхождений.
+
+    Используется, когда SQLite FTS5 недоступен.
+    """
+    term = models.CharField('Слово', max_length=100)
+    post = models.ForeignKey(
+        Post,
+        related_name='search_tokens',
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+    )
+    count = models.PositiveIntegerField('Вхождений', default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'],
+                name='unique_search_token',
+            )
+        ]
+
+
+class FeedWatermark(models.Model):
+    """Время последнего изменения ленты (см. posts.watermarks)."""
+    feed = models.CharField('Лента', max_length=100, primary_key=True)
+    changed_at = models.DateTimeField('Изменена')
+
+    def __str__(self):
+        return f'{self.feed}: {self.changed_at}'
@@ -0,0 +1,370 @@
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              Sum, When)
+
+from . import counts, fragments
+from .models import Comment, Post, SearchToken
+
+FTS_TABLE = 'posts_post_fts'
+COUNT_KEY = 'posts:search_count:{backend}:{terms}:{version}'
+# Версия индекса: меняется после перестройки manage.py reindex_search
+INDEX_VERSION = 'search'
+WORD = re.compile(r'\w+')
+# Длина SearchToken.term
+MAX_TERM_LENGTH = 100
+
+
+def tokenize(text):
+    return [word[:MAX_TERM_LENGTH] for word in WORD.findall(text.lower())]
+
+
+@lru_cache(maxsize=None)
+def fts5_available():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+class FTS5Backend:
+    """Индекс в виртуальной таблице SQLite FTS5, ранжирование по bm25.
+
+    Документ поста — две колонки: текст и комментарии; совпадение
+    в тексте весит вдвое больше.
+    """
+
+    name = 'fts5'
+
+    def match(self, query):
+        # Каждое слово в кавычках: пользовательский ввод не разбирается
+        # как синтаксис FTS5, слова объединяются через AND
+        return ' '.join(f'"{token}"' for token in tokenize(query))
+
+    def prepare(self, docs):
+        return [(pk, text, comments) for pk, (text, comments) in docs.items()]
+
+    def write(self, post_ids, rows):
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+                list(post_ids),
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, comments) '
+                f'VALUES (%s, %s, %s)',
+                rows,
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def delete_orphans(self):
+        """Убирает строки постов, которых больше нет; возвращает их число."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid NOT IN '
+                f'(SELECT id FROM {Post._meta.db_table})'
+            )
+            return cursor.rowcount
+
+    def add_comment(self, post_id, text):
+        """Дописывает комментарий в колонку comments строки поста."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {FTS_TABLE} SET comments = CASE "
+                f"WHEN comments IS NULL OR comments = '' THEN %s "
+                f"ELSE comments || char(10) || %s END WHERE rowid = %s",
+                [text, text, post_id],
+            )
+            return cursor.rowcount > 0
+
+    def remove_comment(self, post_id, text):
+        """Собирает колонку comments заново из оставшихся комментариев.
+
+        Вычесть текст из строки FTS5 нельзя, но склейка идет в SQL:
+        текст поста и комментарии в Python не загружаются.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {FTS_TABLE} SET comments = ('
+                f'SELECT group_concat(text, char(10)) FROM '
+                f'{Comment._meta.db_table} WHERE post_id = %s'
+                f') WHERE rowid = %s',
+                [post_id, post_id],
+            )
+            return cursor.rowcount > 0
+
+    def count(self, query):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match(query)],
+            )
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, query, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 2.0, 1.0), rowid DESC '
+                f'LIMIT %s OFFSET %s',
+                [self.match(query), limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, queryset, query):
+        if not tokenize(query):
+            return queryset.none()
+        return queryset.extra(
+            where=[
+                f'{Post._meta.db_table}.id IN (SELECT rowid FROM '
+                f'{FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[self.match(query)],
+        )
+
+
+class InvertedIndexBackend:
+    """Обратный индекс в таблице SearchToken, ранжирование по TF-IDF.
+
+    Работает на любой БД; используется, если FTS5 недоступен.
+    """
+
+    name = 'python'
+
+    def prepare(self, docs):
+        return [
+            (pk, term, total)
+            for pk, (text, comments) in docs.items()
+            for term, total in Counter(
+                tokenize(text) + tokenize(comments)
+            ).items()
+        ]
+
+    def write(self, post_ids, rows):
+        SearchToken.objects.filter(post_id__in=post_ids).delete()
+        SearchToken.objects.bulk_create(
+            SearchToken(post_id=pk, term=term, count=total)
+            for pk, term, total in rows
+        )
+
+    def clear(self):
+        SearchToken.objects.all().delete()
+
+    def delete_orphans(self):
+        deleted, _ = SearchToken.objects.exclude(
+            post_id__in=Post.objects.values('pk')
+        ).delete()
+        return deleted
+
+    def _shift(self, post_id, text, sign):
+        """Прибавляет или вычитает слова текста из записей поста."""
+        words = Counter(tokenize(text))
+        if not words:
+            return
+        tokens = SearchToken.objects.filter(post_id=post_id)
+        existing = dict(tokens.filter(term__in=words).values_list(
+            'term', 'count'
+        ))
+        # Одно обновление на каждую встретившуюся величину сдвига,
+        # а не на каждое слово
+        by_delta = defaultdict(list)
+        for term in existing:
+            by_delta[words[term]].append(term)
+        for delta, terms in by_delta.items():
+            if sign > 0:
+                tokens.filter(term__in=terms).update(
+                    count=F('count') + delta
+                )
+                continue
+            tokens.filter(term__in=terms, count__lte=delta).delete()
+            tokens.filter(term__in=terms, count__gt=delta).update(
+                count=F('count') - delta
+            )
+        if sign > 0:
+            SearchToken.objects.bulk_create(
+                SearchToken(post_id=post_id, term=term, count=total)
+                for term, total in words.items() if term not in existing
+            )
+
+    def add_comment(self, post_id, text):
+        if not Post.objects.filter(pk=post_id).exists():
+            return False
+        self._shift(post_id, text, 1)
+        return True
+
+    def remove_comment(self, post_id, text):
+        self._shift(post_id, text, -1)
+        return True
+
+    def matches(self, query):
+        """Посты со всеми словами запроса и их TF-IDF, считается в БД.
+
+        None, если какого-то слова нет в индексе.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return None
+        postings = SearchToken.objects.filter(term__in=terms)
+        frequencies = dict(postings.order_by().values_list('term').annotate(
+            total=Count('pk')
+        ))
+        if len(frequencies) < len(terms):
+            return None
+        total = counts.get_feed_count(counts.ALL_FEED, Post.objects.all())
+        score = Sum(Case(
+            *(
+                When(term=term, then=ExpressionWrapper(
+                    F('count') * math.log(1 + total / frequency),
+                    output_field=FloatField(),
+                ))
+                for term, frequency in frequencies.items()
+            ),
+            output_field=FloatField(),
+        ))
+        return postings.order_by().values('post_id').annotate(
+            matched=Count('pk'), score=score,
+        ).filter(matched=len(terms))
+
+    def count(self, query):
+        matches = self.matches(query)
+        return 0 if matches is None else matches.count()
+
+    def ranked_ids(self, query, offset, limit):
+        matches = self.matches(query)
+        if matches is None:
+            return []
+        return list(matches.order_by('-score', '-post_id').values_list(
+            'post_id', flat=True
+        )[offset:offset + limit])
+
+    def filter(self, queryset, query):
+        terms = set(tokenize(query))
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            queryset = queryset.filter(pk__in=SearchToken.objects.filter(
+                term=term
+            ).values('post_id'))
+        return queryset
+
+
+BACKENDS = {
+    FTS5Backend.name: FTS5Backend,
+    InvertedIndexBackend.name: InvertedIndexBackend,
+}
+
+
+def get_backend(name=None):
+    name = name or settings.SEARCH_BACKEND
+    if name == 'auto':
+        name = FTS5Backend.name if fts5_available() else 'python'
+    return BACKENDS[name]()
+
+
+def documents(post_ids):
+    """Тексты постов и их комментариев: {id: (текст, комментарии)}."""
+    texts = dict(Post.objects.filter(pk__in=post_ids).values_list(
+        'pk', 'text'
+    ))
+    comments = {pk: [] for pk in texts}
+    rows = Comment.objects.filter(post_id__in=texts).order_by(
+        'pk'
+    ).values_list('post_id', 'text')
+    for post_id, text in rows:
+        comments[post_id].append(text)
+    return {
+        pk: (text, '\n'.join(comments[pk])) for pk, text in texts.items()
+    }
+
+
+def prepare_batch(backend_name, post_ids):
+    """Строки индекса для пачки постов; без записи, для пула процессов."""
+    backend = get_backend(backend_name)
+    return post_ids, backend.prepare(documents(post_ids))
+
+
+def index_posts(post_ids, backend=None):
+    """Переиндексирует посты; удаленные посты убираются из индекса."""
+    backend = backend or get_backend()
+    rows = backend.prepare(documents(post_ids))
+    # Удаление и вставка — одной транзакцией: иначе два комментария
+    # к одному посту вставят его строку индекса дважды
+    with transaction.atomic():
+        backend.write(post_ids, rows)
+
+
+def add_comment(post_id, text, backend=None):
+    """Добавляет новый комментарий в документ поста без его пересборки.
+
+    Пост, которого еще нет в индексе, индексируется целиком.
+    """
+    backend = backend or get_backend()
+    with transaction.atomic():
+        if not backend.add_comment(post_id, text):
+            index_posts([post_id], backend)
+
+
+def remove_comment(post_id, text, backend=None):
+    """Убирает удаленный комментарий из документа поста."""
+    backend = backend or get_backend()
+    with transaction.atomic():
+        backend.remove_comment(post_id, text)
+
+
+def count_key(backend, query):
+    """Ключ числа результатов: слова запроса и версии общей ленты и индекса.
+
+    Версия ленты меняется с любым постом и комментарием, версия
+    индекса — с его перестройкой, поэтому закешированное число
+    не переживает изменения документов.
+    """
+    terms = ' '.join(sorted(set(tokenize(query))))
+    return COUNT_KEY.format(
+        backend=backend.name,
+        terms=hashlib.md5(terms.encode()).hexdigest(),
+        version='.'.join(fragments.versions([counts.ALL_FEED, INDEX_VERSION])),
+    )
+
+
+class SearchResults:
+    """Ранжированная выдача; поддерживает count() и срезы для Paginator."""
+
+    def __init__(self, query, backend=None):
+        self.query = query
+        self.backend = backend or get_backend()
+
+    def count(self):
+        if not tokenize(self.query):
+            return 0
+        key = count_key(self.backend, self.query)
+        total = cache.get(key)
+        if total is None:
+            total = self.backend.count(self.query)
+            cache.set(key, total, settings.POSTS_COUNT_TIMEOUT)
+        return total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not tokenize(self.query):
+            return []
+        start = index.start or 0
+        ids = self.backend.ranked_ids(self.query, start, index.stop - start)
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
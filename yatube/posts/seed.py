@@ -0,0 +1,204 @@
+import bisect
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from core.utils import chunked
+
+from .models import Comment, FeedWatermark, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+# Показатель степенного закона: популярность автора обратна его рангу
+POWER = 1.1
+# Размер всплеска публикаций — распределение Парето с этим показателем
+BURST_SHAPE = 1.5
+# Посты всплеска разнесены в среднем на столько секунд
+BURST_SPREAD = 15 * 60
+# Доля постов без группы
+UNGROUPED = 0.3
+
+
+def next_pk(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def power_law(count):
+    """Накопленные веса рангов 1..count по степенному закону."""
+    return list(itertools.accumulate(
+        1 / rank ** POWER for rank in range(1, count + 1)
+    ))
+
+
+def bursty_dates(count, days, rng):
+    """Даты публикаций по возрастанию, собранные во всплески.
+
+    Всплески идут по оси времени пуассоновским потоком, их размер
+    распределен по Парето: большинство одиночные, изредка — десятки
+    постов подряд.
+    """
+    now = timezone.now()
+    start = now - timedelta(days=days)
+    mean_burst = BURST_SHAPE / (BURST_SHAPE - 1)
+    gap = days * 86400 * mean_burst / max(count, 1)
+    moment = 0.0
+    produced = 0
+    while produced < count:
+        moment += rng.expovariate(1 / gap)
+        size = min(int(rng.paretovariate(BURST_SHAPE)), count - produced)
+        offsets = sorted(
+            moment + rng.expovariate(1 / BURST_SPREAD) for _ in range(size)
+        )
+        for offset in offsets:
+            yield min(start + timedelta(seconds=offset), now)
+        produced += size
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Отключает auto_now и auto_now_add: даты берутся из объектов."""
+    fields = [
+        field for model in models for field in model._meta.fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+class Popularity:
+    """Случайный выбор из population с весами по степенному закону."""
+
+    def __init__(self, population, rng):
+        self.population = rng.sample(population, len(population))
+        self.cum_weights = power_law(len(population))
+        self.rng = rng
+
+    def __bool__(self):
+        return bool(self.population)
+
+    def pick(self):
+        point = self.rng.random() * self.cum_weights[-1]
+        return self.population[bisect.bisect(self.cum_weights, point)]
+
+
+def generate_posts(rng, count, days, writers, topics, user_ids, comments):
+    """Пары (пост, его комментарии) с заранее выданными id."""
+    now = timezone.now()
+    post_ids = itertools.count(next_pk(Post))
+    comment_ids = itertools.count(next_pk(Comment))
+    for date in bursty_dates(count, days, rng):
+        pk = next(post_ids)
+        group_id = None
+        if topics and rng.random() >= UNGROUPED:
+            group_id = topics.pick()
+        post = Post(
+            pk=pk,
+            text=f'Пост {pk}',
+            author_id=writers.pick(),
+            group_id=group_id,
+            pub_date=date,
+            updated_at=date,
+        )
+        replies = []
+        for _ in range(int(rng.expovariate(1 / comments)) if comments else 0):
+            commented = min(
+                date + timedelta(seconds=rng.expovariate(1 / 3600)), now
+            )
+            replies.append(Comment(
+                pk=next(comment_ids),
+                text=f'Комментарий к посту {pk}',
+                post_id=pk,
+                author_id=rng.choice(user_ids),
+                pub_date=commented,
+                updated_at=commented,
+            ))
+        yield post, replies
+
+
+def generate_follows(rng, user_ids, readable, follows):
+    pk = next_pk(Follow)
+    for user_id in user_ids:
+        wanted = int(rng.expovariate(1 / follows)) if follows else 0
+        authors = {
+            readable.pick() for _ in range(min(wanted, len(user_ids) - 1))
+        }
+        authors.discard(user_id)
+        for author_id in sorted(authors):
+            yield Follow(pk=pk, user_id=user_id, author_id=author_id)
+            pk += 1
+
+
+def seed(users=1000, groups=50, posts=20_000, comments=2, follows=20,
+         days=365, batch_size=BATCH_SIZE, random_seed=0, progress=None):
+    """Наполняет базу синтетическими данными с реалистичным перекосом.
+
+    Число подписчиков и постов у авторов подчиняется степенному
+    закону, посты публикуются всплесками, comments и follows —
+    средние числа комментариев на пост и подписок на пользователя.
+    Строки вставляются bulk_create пачками по batch_size с заранее
+    известными id, поэтому сигналы не срабатывают: счетчики, ленты
+    и поиск нужно пересобрать (см. manage.py seed).
+    progress(модель, сколько вставлено) вызывается после каждой пачки.
+    """
+    rng = random.Random(random_seed)
+    progress = progress or (lambda model, done: None)
+
+    def insert(model, objects):
+        done = 0
+        for chunk in chunked(objects, batch_size):
+            model.objects.bulk_create(chunk)
+            done += len(chunk)
+            progress(model, done)
+
+    first_user = next_pk(User)
+    user_ids = range(first_user, first_user + users)
+    insert(User, (
+        User(pk=pk, username=f'seed{pk}', password='!') for pk in user_ids
+    ))
+    first_group = next_pk(Group)
+    group_ids = range(first_group, first_group + groups)
+    insert(Group, (
+        Group(pk=pk, title=f'Группа {pk}', slug=f'seed-{pk}', description='')
+        for pk in group_ids
+    ))
+
+    # Ранги популярности независимы для постов и для подписчиков:
+    # плодовитый автор не обязательно самый читаемый
+    writers = Popularity(user_ids, rng)
+    topics = Popularity(group_ids, rng)
+    rows = generate_posts(rng, posts, days, writers, topics, user_ids,
+                          comments)
+    with explicit_dates(Post, Comment):
+        done = 0
+        for chunk in chunked(rows, batch_size):
+            Post.objects.bulk_create(post for post, _ in chunk)
+            # Комментарии пишутся вслед за своими постами
+            Comment.objects.bulk_create(
+                comment for _, replies in chunk for comment in replies
+            )
+            done += len(chunk)
+            progress(Post, done)
+
+    readable = Popularity(user_ids, rng)
+    insert(Follow, generate_follows(rng, user_ids, readable, follows))
+
+
+def invalidate():
+    """Сбрасывает кеши и отметки изменения после записи мимо сигналов."""
+    FeedWatermark.objects.update(changed_at=timezone.now())
+    cache.clear()
@@ -0,0 +1,183 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import jobs, storage
+
+from . import effects, feeds, search, stats
+from .models import (Comment, Follow, Group, GroupStats, Post, PostStats,
+                     UserStats)
+
+
+# Счетчики статистики подключаются первыми: остальные обработчики
+# могут прочитать их и лениво создать недостающую строку.
+@receiver(post_save, sender=Post)
+def count_post_stats(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.bump(UserStats, instance.author_id, posts_count=1)
+        stats.bump(GroupStats, instance.group_id, posts_count=1)
+        return
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if old_group_id != instance.group_id:
+        stats.bump(GroupStats, old_group_id, posts_count=-1)
+        stats.bump(GroupStats, instance.group_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post_stats(sender, instance, **kwargs):
+    stats.bump(UserStats, instance.author_id, posts_count=-1)
+    stats.bump(GroupStats, instance.group_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        stats.bump(UserStats, instance.author_id, comments_count=1)
+        stats.bump(PostStats, instance.post_id, comments_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment_stats(sender, instance, **kwargs):
+    stats.bump(UserStats, instance.author_id, comments_count=-1)
+    stats.bump(PostStats, instance.post_id, comments_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        stats.bump(UserStats, instance.author_id, followers_count=1)
+        stats.bump(UserStats, instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow_stats(sender, instance, **kwargs):
+    stats.bump(UserStats, instance.author_id, followers_count=-1)
+    stats.bump(UserStats, instance.user_id, following_count=-1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, raw, **kwargs):
+    """Запоминает прежние группу и картинку поста перед редактированием."""
+    instance._old_group_id = None
+    instance._old_image = ''
+    if raw or instance.pk is None:
+        return
+    previous = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', 'image').first()
+    if previous is not None:
+        instance._old_group_id, instance._old_image = previous
+
+
+@receiver(post_save, sender=Post)
+def count_image_refs(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    old_image = getattr(instance, '_old_image', '')
+    if instance.image.name != old_image:
+        storage.acquire(instance.image.name, instance.image.storage)
+        storage.release(old_image, instance.image.storage)
+
+
+@receiver(post_delete, sender=Post)
+def release_image(sender, instance, **kwargs):
+    storage.release(instance.image.name, instance.image.storage)
+
+
+@receiver(post_save, sender=Post)
+def apply_saved_post(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        effects.posts_created(instance.author_id, [instance])
+        if feeds.is_enabled():
+            jobs.enqueue('posts.fan_out', post_id=instance.pk)
+        return
+    effects.post_edited(instance, getattr(instance, '_old_group_id', None))
+
+
+@receiver(post_delete, sender=Post)
+def apply_deleted_post(sender, instance, **kwargs):
+    effects.post_deleted(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def apply_follow(sender, instance, **kwargs):
+    effects.follows_changed(instance.user_id, [instance.author_id])
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw, **kwargs):
+    if not created or raw:
+        return
+    if feeds.is_enabled():
+        jobs.enqueue(
+            'posts.backfill',
+            user_id=instance.user_id,
+            author_id=instance.author_id,
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def purge_timeline(sender, instance, **kwargs):
+    if not feeds.is_enabled():
+        return
+    jobs.enqueue(
+        'posts.purge',
+        user_id=instance.user_id,
+        author_id=instance.author_id,
+    )
+    # Счетчик подписчиков уже уменьшен обработчиком статистики
+    if feeds.left_celebrities(instance.author_id):
+        jobs.enqueue('posts.demote', author_id=instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def apply_comment(sender, instance, **kwargs):
+    post = Post.objects.filter(pk=instance.post_id).first()
+    if post is not None:
+        effects.comments_changed([post])
+
+
+@receiver(pre_save, sender=Group)
+def remember_previous_slug(sender, instance, raw, **kwargs):
+    instance._old_slug = None
+    if not raw and instance.pk is not None:
+        instance._old_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def apply_group(sender, instance, **kwargs):
+    effects.group_changed(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_posts([instance.pk])
+
+
+# Комментарии входят в документ своего поста. Новый и удаленный
+# комментарий меняют документ на свой текст; правка текста, которого
+# до сохранения не знаем, переиндексирует пост целиком.
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, created, raw, **kwargs):
+    if raw or not instance.post_id:
+        return
+    if created:
+        search.add_comment(instance.post_id, instance.text)
+    else:
+        search.index_posts([instance.post_id])
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    if instance.post_id:
+        search.remove_comment(instance.post_id, instance.text)
@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import router, transaction
+from django.db.models import Count, F
+
+from .models import (Comment, Follow, Group, GroupStats, Post, PostStats,
+                     UserStats)
+
+User = get_user_model()
+
+# Счетчик -> (модель, поле, по которому считаются ее строки)
+USER_COUNTERS = {
+    'posts_count': (Post, 'author_id'),
+    'followers_count': (Follow, 'author_id'),
+    'following_count': (Follow, 'user_id'),
+    'comments_count': (Comment, 'author_id'),
+}
+GROUP_COUNTERS = {'posts_count': (Post, 'group_id')}
+POST_COUNTERS = {'comments_count': (Comment, 'post_id')}
+
+# Таблица счетчиков, модель-владелец и способ пересчета
+STATS = (
+    (UserStats, User, USER_COUNTERS),
+    (GroupStats, Group, GROUP_COUNTERS),
+    (PostStats, Post, POST_COUNTERS),
+)
+
+
+def bump(stats_model, pk, **deltas):
+    """Сдвигает счетчики существующей строки.
+
+    Отсутствующая строка не создается: ее посчитают с нуля при первом
+    чтении, иначе при каскадном удалении можно вставить строку
+    для объекта, который вот-вот будет удален.
+    """
+    if pk is None:
+        return
+    stats_model.objects.filter(pk=pk).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def compute(counters, pks):
+    """Считает счетчики с нуля: один GROUP BY на каждый счетчик.
+
+    Всегда по основной базе: результат записывается в таблицу
+    счетчиков, и значения с отстающей реплики расходились бы навсегда.
+    """
+    values = {pk: dict.fromkeys(counters, 0) for pk in pks}
+    for field, (model, key) in counters.items():
+        rows = model.objects.db_manager(
+            router.db_for_write(model)
+        ).order_by().filter(
+            **{f'{key}__in': pks}
+        ).values_list(key).annotate(total=Count('pk'))
+        for pk, total in rows:
+            values[pk][field] = total
+    return values
+
+
+def create_many(stats_model, counters, pks):
+    """Вставляет недостающие строки счетчиков и считает их с нуля.
+
+    Пустые строки вставляются до подсчета, в той же транзакции: вставка
+    берет блокировку записи, и bump() параллельного писателя либо уже
+    закоммичен и виден подсчету, либо дождется коммита и сдвинет
+    вставленную строку. При подсчете до вставки такой bump() не нашел
+    бы строки и потерялся бы до rebuild_stats.
+    """
+    db = router.db_for_write(stats_model)
+    manager = stats_model.objects.db_manager(db)
+    with transaction.atomic(using=db):
+        manager.bulk_create(
+            [stats_model(pk=pk) for pk in pks], ignore_conflicts=True,
+        )
+        created = [
+            stats_model(pk=pk, **values)
+            for pk, values in compute(counters, pks).items()
+        ]
+        manager.bulk_update(created, list(counters))
+    return created
+
+
+def get_many(stats_model, counters, pks):
+    """Счетчики для набора объектов; недостающие строки досчитываются."""
+    found = stats_model.objects.in_bulk(pks)
+    missing = [pk for pk in pks if pk not in found]
+    if missing:
+        found.update(
+            (stats.pk, stats)
+            for stats in create_many(stats_model, counters, missing)
+        )
+    return found
+
+
+def get(stats_model, counters, pk):
+    stats = stats_model.objects.filter(pk=pk).first()
+    if stats is not None:
+        return stats
+    return create_many(stats_model, counters, [pk])[0]
+
+
+def joined(owner, getter):
+    """Счетчики, подтянутые select_related('stats'), или посчитанные."""
+    try:
+        return owner.stats
+    except ObjectDoesNotExist:
+        return getter(owner.pk)
+
+
+def user_stats(user_id):
+    return get(UserStats, USER_COUNTERS, user_id)
+
+
+def group_stats(group_id):
+    return get(GroupStats, GROUP_COUNTERS, group_id)
+
+
+def post_stats(post_id):
+    return get(PostStats, POST_COUNTERS, post_id)
+
+
+def rebuild(stats_model, counters, pks, verify=False):
+    """Пересчитывает (или только сверяет) счетчики пачки объектов.
+
+    Возвращает число объектов, у которых хранимые значения разошлись
+    с посчитанными заново.
+    """
+    fresh = compute(counters, pks)
+    stored = stats_model.objects.in_bulk(pks)
+    wrong = [
+        pk for pk, values in fresh.items()
+        if pk in stored and any(
+            getattr(stored[pk], field) != value
+            for field, value in values.items()
+        )
+    ]
+    if not verify:
+        stale = wrong + [pk for pk in fresh if pk not in stored]
+        with transaction.atomic():
+            stats_model.objects.filter(pk__in=wrong).delete()
+            stats_model.objects.bulk_create(
+                stats_model(pk=pk, **fresh[pk]) for pk in stale
+            )
+    return len(wrong)
@@ -0,0 +1,170 @@
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import router
+from django.db.models import Count
+
+from . import counts
+from .common import CURSOR_PARAM, KeysetPage, KeysetPaginator
+from .feeds import TIMELINE_KEYS, FeedItem
+from .models import Group, Post
+
+SUMMARY_KEY = 'posts:group_summary:{slug}'
+
+# latest — (pub_date, id) свежих постов по убыванию,
+# top_authors — (id, username, постов в группе) по убыванию
+GroupSummary = namedtuple('GroupSummary', (
+    'id', 'slug', 'title', 'description', 'posts_count', 'latest',
+    'top_authors',
+))
+
+
+def summary_key(slug):
+    return SUMMARY_KEY.format(slug=slug)
+
+
+def build(slug):
+    """Сводка группы из основной базы или None, если группы нет.
+
+    Сводка ложится в общий кеш, поэтому реплика для нее не годится:
+    собранная до синхронизации, она пережила бы ее.
+    """
+    group = Group.objects.using(
+        router.db_for_write(Group)
+    ).filter(slug=slug).first()
+    if group is None:
+        return None
+    posts = Post.objects.using(router.db_for_write(Post)).filter(group=group)
+    latest = list(posts.order_by('-pub_date', '-pk').values_list(
+        'pub_date', 'pk'
+    )[:settings.GROUP_SUMMARY_POSTS])
+    top_authors = list(posts.order_by().values_list(
+        'author_id', 'author__username'
+    ).annotate(total=Count('pk')).order_by(
+        '-total', 'author_id'
+    )[:settings.GROUP_SUMMARY_TOP_AUTHORS])
+    feed = counts.group_feed(group.pk)
+    return GroupSummary(
+        id=group.pk,
+        slug=group.slug,
+        title=group.title,
+        description=group.description,
+        posts_count=counts.get_feed_count(feed, posts),
+        latest=latest,
+        top_authors=top_authors,
+    )
+
+
+def get(slug):
+    """Сводка из кеша; промах собирается и кладется в кеш."""
+    summary = cache.get(summary_key(slug))
+    if summary is None:
+        summary = build(slug)
+        if summary is not None:
+            cache.set(
+                summary_key(slug), summary, settings.GROUP_SUMMARY_TIMEOUT
+            )
+    return summary
+
+
+def forget(slugs):
+    cache.delete_many([summary_key(slug) for slug in slugs if slug])
+
+
+def forget_groups(group_ids):
+    group_ids = [pk for pk in group_ids if pk]
+    if group_ids:
+        forget(Group.objects.filter(pk__in=group_ids).values_list(
+            'slug', flat=True
+        ))
+
+
+def _top_authors(summary, posts):
+    totals = {pk: [username, total]
+              for pk, username, total in summary.top_authors}
+    added = Counter(post.author_id for post in posts)
+    usernames = {post.author_id: post.author.username for post in posts}
+    for author_id, total in added.items():
+        if author_id in totals:
+            totals[author_id][1] += total
+        else:
+            # Автора не было среди лидеров: его посты в группе, уже
+            # вместе с новыми, считаются по индексу (author, pub_date)
+            totals[author_id] = [
+                usernames[author_id],
+                Post.objects.using(router.db_for_write(Post)).filter(
+                    group_id=summary.id, author_id=author_id
+                ).count(),
+            ]
+    ranked = sorted(
+        ((pk, username, total) for pk, (username, total) in totals.items()),
+        key=lambda row: (-row[2], row[0]),
+    )
+    return ranked[:settings.GROUP_SUMMARY_TOP_AUTHORS]
+
+
+def add_posts(group_id, posts):
+    """Дописывает новые посты группы в закешированную сводку.
+
+    Сводки нет в кеше — ничего не делается: ее соберут при чтении.
+    Удаления и переносы постов между группами сводку сбрасывают.
+    Вызывается после коммита (posts.effects): откаченный пост
+    в сводку не попадет.
+    slug берется из базы: у объекта группы в памяти он может устареть.
+    """
+    slug = Group.objects.filter(pk=group_id).values_list(
+        'slug', flat=True
+    ).first()
+    summary = cache.get(summary_key(slug))
+    if summary is None or not posts:
+        return
+    latest = sorted(
+        summary.latest + [(post.pub_date, post.pk) for post in posts],
+        reverse=True,
+    )[:settings.GROUP_SUMMARY_POSTS]
+    cache.set(summary_key(slug), summary._replace(
+        posts_count=summary.posts_count + len(posts),
+        latest=latest,
+        top_authors=_top_authors(summary, posts),
+    ), settings.GROUP_SUMMARY_TIMEOUT)
+
+
+class SummaryPaginator(Paginator):
+    """Paginator, который берет число постов из сводки группы."""
+
+    def __init__(self, object_list, per_page, count):
+        super().__init__(object_list, per_page)
+        self.count = count
+
+
+def first_page(request, summary, post_list, per_page):
+    """Первая страница группы по id из сводки, без сортировки ленты.
+
+    Посты загружаются лениво, одним запросом по первичному ключу,
+    и только если фрагмент списка не нашелся в кеше. Для остальных
+    страниц возвращает None: их отдает поиск по индексу группы.
+    """
+    keyset = (settings.POSTS_PAGINATION == 'keyset'
+              or CURSOR_PARAM in request.GET)
+    if keyset and request.GET.get(CURSOR_PARAM):
+        return None
+    if not keyset and request.GET.get('page') not in (None, '', '1'):
+        return None
+    entries = [FeedItem(*row) for row in summary.latest[:per_page + 1]]
+    posts = post_list.filter(
+        pk__in=[entry.post_id for entry in entries[:per_page]]
+    ).order_by('-pub_date', '-pk')
+    if keyset:
+        page = KeysetPage(
+            entries[:per_page],
+            KeysetPaginator(post_list, per_page, TIMELINE_KEYS),
+            has_next=len(entries) > per_page,
+            has_previous=False,
+        )
+        page.object_list = posts
+        return page
+    return Page(posts, 1, SummaryPaginator(
+        post_list, per_page, summary.posts_count
+    ))
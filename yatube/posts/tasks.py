@@ -0,0 +1,39 @@
+from core.jobs import task
+
+from . import feeds, thumbnails
+from .models import Follow, Post
+
+
+@task('posts.thumbnails')
+def generate_thumbnails(name):
+    thumbnails.generate(name)
+
+
+@task('posts.fan_out')
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'pk', 'author_id', 'pub_date'
+    ).first()
+    if post is not None:
+        feeds.fan_out(post)
+
+
+# Подписка и отписка могут выполниться не в том порядке, в каком
+# случились, поэтому задача сверяется с текущим состоянием подписки.
+@task('posts.backfill')
+def backfill(user_id, author_id):
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        feeds.backfill(user_id, author_id)
+
+
+@task('posts.purge')
+def purge(user_id, author_id):
+    if not Follow.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).exists():
+        feeds.purge(user_id, author_id)
+
+
+@task('posts.demote')
+def demote(author_id):
+    feeds.demote(author_id)
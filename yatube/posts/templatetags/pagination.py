@@ -0,0 +1,17 @@
+from django import template
+
+register = template.Library()
+
+# Сколько номеров страниц показывать по обе стороны от текущей
+PAGE_WINDOW = 3
+
+
+@register.filter
+def page_window(page, size=PAGE_WINDOW):
+    """Номера страниц рядом с текущей вместо всего page_range.
+
+    На больших лентах страниц тысячи, и их перебор в шаблоне
+    становится дороже самих запросов.
+    """
+    last = page.paginator.num_pages
+    return range(max(page.number - size, 1), min(page.number + size, last) + 1)
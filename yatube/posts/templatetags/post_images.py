@@ -0,0 +1,20 @@
+from django import template
+
+from .. import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, geometry, **options):
+    """Миниатюра, если она уже сгенерирована, иначе None.
+
+    Отсутствующая миниатюра ставится в очередь, а шаблон показывает
+    заглушку, не задерживая ответ генерацией.
+    """
+    if not image:
+        return None
+    thumbnail = thumbnails.lookup(image, geometry, **options)
+    if thumbnail is None:
+        thumbnails.schedule(image.name)
+    return thumbnail
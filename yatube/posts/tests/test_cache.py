@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import commit_callbacks
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(11):
+            Post.objects.create(
+                text=f'Тестовый пост {i}', author=cls.user, group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_repeated_page_served_from_cache(self):
+        """Повторный запрос главной страницы не обращается к базе"""
+        url = reverse('posts:main_page')
+        first = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        self.assertEqual(first.content, second.content)
+
+    def test_pages_cached_separately(self):
+        """У каждой страницы ленты свой фрагмент"""
+        url = reverse('posts:main_page')
+        first = self.guest_client.get(url)
+        second = self.guest_client.get(url + '?page=2')
+        self.assertNotEqual(first.content, second.content)
+        self.assertIn('Тестовый пост 0', second.content.decode())
+
+    def test_writes_invalidate_fragments(self):
+        """Создание, правка и удаление постов сразу видны в лентах"""
+        urls = (
+            reverse('posts:main_page'),
+            reverse('posts:posts_by_groups', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        with commit_callbacks():
+            post = Post.objects.create(
+                text='Свежий пост', author=self.user, group=self.group,
+            )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('Свежий пост', response.content.decode())
+        post.text = 'Исправленный пост'
+        with commit_callbacks():
+            post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('Исправленный пост', response.content.decode())
+        with commit_callbacks():
+            post.delete()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotIn('Исправленный', response.content.decode())
+
+    def test_group_and_follow_invalidate_fragments(self):
+        """Смена группы и подписки сбрасывают фрагменты"""
+        url = reverse('posts:main_page')
+        self.guest_client.get(url)
+        self.group.slug = 'new-slug'
+        with commit_callbacks():
+            self.group.save()
+        self.assertIn('new-slug', self.guest_client.get(url).content.decode())
+
+        reader = User.objects.create_user(username='reader')
+        reader_client = Client()
+        reader_client.force_login(reader)
+        follow_url = reverse('posts:follow_index')
+        self.assertNotIn(
+            'Тестовый пост', reader_client.get(follow_url).content.decode()
+        )
+        with commit_callbacks():
+            Follow.objects.create(user=reader, author=self.user)
+        self.assertIn(
+            'Тестовый пост', reader_client.get(follow_url).content.decode()
+        )
+
+    def test_comment_bumps_post_feeds(self):
+        """Комментарий меняет версию лент своего поста"""
+        url = reverse('posts:main_page')
+        self.guest_client.get(url)
+        key = self.guest_client.get(url).context['fragment_key']
+        with commit_callbacks():
+            Comment.objects.create(
+                text='Комментарий', author=self.user,
+                post=Post.objects.first(),
+            )
+        self.assertNotEqual(
+            self.guest_client.get(url).context['fragment_key'], key,
+        )
@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import commit_callbacks
+
+from .. import counts, watermarks
+from ..models import Comment, FeedWatermark, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.urls = {
+            'index': reverse('posts:main_page'),
+            'group': reverse('posts:posts_by_groups', kwargs={
+                'slug': 'group',
+            }),
+            'profile': reverse('posts:profile', kwargs={
+                'username': 'author',
+            }),
+            'post': reverse('posts:post_detail', kwargs={
+                'post_id': self.post.pk,
+            }),
+        }
+
+    def etag(self, url, client=None):
+        client = client or self.client
+        # Первый ответ страницы с формой ставит CSRF-куку, от которой
+        # зависит ETag
+        client.get(url)
+        return client.get(url)['ETag']
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_page_is_not_rendered(self):
+        """Неизменная страница отдает 304 без рендеринга шаблона"""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.revalidate(url, self.etag(url))
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+
+    def test_writes_change_etag(self):
+        """Пост, комментарий и подписка меняют ETag зависимых страниц"""
+        etags = {name: self.etag(url) for name, url in self.urls.items()}
+        with commit_callbacks():
+            Comment.objects.create(
+                text='Ого', author=self.reader, post=self.post,
+            )
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertEqual(
+                    self.revalidate(url, etags[name]).status_code, 200
+                )
+
+        profile = self.urls['profile']
+        etag = self.etag(profile)
+        with commit_callbacks():
+            Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.revalidate(profile, etag).status_code, 200)
+
+    def test_etag_depends_on_user_and_page(self):
+        """ETag различается для пользователей и номеров страниц"""
+        url = self.urls['index']
+        self.assertNotEqual(self.etag(url), self.etag(url, Client()))
+        self.assertNotEqual(self.etag(url), self.etag(url + '?page=2'))
+
+    def test_missing_object_is_not_found(self):
+        """Для несуществующего поста ETag не считается, ответ — 404"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class WatermarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_writes_move_watermarks(self):
+        """Запись поста сдвигает отметки его лент и updated_at"""
+        before = timezone.now()
+        with commit_callbacks():
+            post = Post.objects.create(
+                text='Пост', author=self.author, group=self.group,
+            )
+        for name in (counts.ALL_FEED, counts.group_feed(self.group.pk)):
+            self.assertGreaterEqual(
+                FeedWatermark.objects.get(feed=name).changed_at, before,
+            )
+        created = post.updated_at
+        post.text = 'Правка'
+        with commit_callbacks():
+            post.save()
+        self.assertGreater(post.updated_at, created)
+        self.assertEqual(
+            watermarks.last_modified([counts.ALL_FEED]), post_watermark(),
+        )
+
+    def test_last_modified_revalidation(self):
+        """Last-Modified берется из отметок, If-Modified-Since дает 304"""
+        with commit_callbacks():
+            Post.objects.create(text='Пост', author=self.author)
+        url = reverse('posts:main_page')
+        last_modified = Client().get(url)['Last-Modified']
+        response = Client().get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        FeedWatermark.objects.update(
+            changed_at=timezone.now() + timedelta(minutes=1)
+        )
+        cache.clear()
+        response = Client().get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+
+def post_watermark():
+    return FeedWatermark.objects.get(feed=counts.ALL_FEED).changed_at
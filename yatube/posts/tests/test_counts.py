@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import commit_callbacks
+
+from .. import counts, stats
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def cached_count(feed):
+    return cache.get(counts.count_key(feed))
+
+
+@override_settings(FEED_FANOUT=False)
+class FeedCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Test Group',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.group2 = Group.objects.create(
+            title='Test Group 2',
+            slug='test_group_2',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(3):
+            Post.objects.create(
+                text=f'Test text {i}',
+                author=cls.author,
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def warm_up(self):
+        self.reader_client.get(reverse('posts:main_page'))
+        self.reader_client.get(
+            reverse('posts:posts_by_groups', kwargs={'slug': 'test_group'})
+        )
+        self.reader_client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.reader_client.get(reverse('posts:follow_index'))
+
+    def feeds(self):
+        return (
+            counts.ALL_FEED,
+            counts.group_feed(self.group.pk),
+            counts.author_feed(self.author.pk),
+            counts.follow_feed(self.reader.pk),
+        )
+
+    def test_counts_follow_post_writes(self):
+        """Счетчики лент меняются при создании и удалении поста"""
+        self.warm_up()
+        for feed in self.feeds():
+            self.assertEqual(cached_count(feed), 3, feed)
+
+        with commit_callbacks():
+            post = Post.objects.create(
+                text='Новый пост', author=self.author, group=self.group,
+            )
+        for feed in self.feeds():
+            self.assertEqual(cached_count(feed), 4, feed)
+
+        with commit_callbacks():
+            post.delete()
+        for feed in self.feeds():
+            self.assertEqual(cached_count(feed), 3, feed)
+
+    def test_group_change_moves_count(self):
+        """Смена группы переносит пост между счетчиками групп"""
+        self.warm_up()
+        self.reader_client.get(
+            reverse('posts:posts_by_groups', kwargs={'slug': 'test_group_2'})
+        )
+        post = Post.objects.filter(group=self.group).first()
+        post.group = self.group2
+        with commit_callbacks():
+            post.save()
+        self.assertEqual(cached_count(counts.group_feed(self.group.pk)), 2)
+        self.assertEqual(cached_count(counts.group_feed(self.group2.pk)), 1)
+
+    def test_follow_resets_count(self):
+        """Подписка сбрасывает счетчик ленты подписчика"""
+        self.warm_up()
+        with commit_callbacks():
+            Follow.objects.filter(user=self.reader).delete()
+        self.assertIsNone(cached_count(counts.follow_feed(self.reader.pk)))
+
+    @override_settings(FEED_CELEBRITY_THRESHOLD=1)
+    def test_celebrity_post_expires_follow_counts(self):
+        """Пост «звезды» сбрасывает счетчики подписок, не обходя их"""
+        self.warm_up()
+        stats.user_stats(self.author.pk)
+        follow = counts.follow_feed(self.reader.pk)
+        with mock.patch.object(
+            counts, 'shift_counts', wraps=counts.shift_counts
+        ) as shift_counts, commit_callbacks():
+            Post.objects.create(text='Звездный пост', author=self.author)
+        shifted = {
+            feed for call in shift_counts.call_args_list for feed in call[0][0]
+        }
+        self.assertNotIn(follow, shifted)
+        self.assertIsNone(cached_count(follow))
+        self.assertEqual(cached_count(counts.ALL_FEED), 4)
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 4)
+
+    def test_page_without_count_query(self):
+        """С прогретым счетчиком страница не выполняет COUNT(*)"""
+        guest = Client()
+        url = reverse('posts:posts_by_groups', kwargs={'slug': 'test_group'})
+        guest.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            guest.get(url)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+    @override_settings(POSTS_COUNT_ESTIMATE_THRESHOLD=2)
+    def test_large_feed_is_estimated(self):
+        """Для большой общей ленты используется оценка по диапазону id"""
+        posts = Post.objects.order_by('pk')
+        expected = posts.last().pk - posts.first().pk + 1
+        self.assertEqual(
+            counts.get_feed_count(counts.ALL_FEED, Post.objects.all()),
+            expected,
+        )
@@ -0,0 +1,113 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from .. import export, seed
+from ..models import Comment, Follow, Group, Post
+
+
+def read_ndjson(directory, name):
+    """Строки всех файлов выгрузки таблицы по порядку частей."""
+    files = sorted(
+        file for file in os.listdir(directory)
+        if file.startswith(name) and file.endswith('.gz')
+    )
+    rows = []
+    for file in files:
+        with gzip.open(os.path.join(directory, file), 'rt') as source:
+            rows += [json.loads(line) for line in source]
+    return rows
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed.seed(users=20, groups=3, posts=300, comments=2, follows=5)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = self.directory.name
+
+    def export(self, **options):
+        call_command(
+            'export', self.path, gzip=True, chunk_size=50,
+            stdout=StringIO(), **options
+        )
+
+    def test_exports_every_table(self):
+        """Все строки выгружены без повторов, диапазоны не пересекаются."""
+        self.export(processes=0)
+        for name, model in (
+            ('groups', Group), ('posts', Post),
+            ('comments', Comment), ('follows', Follow),
+        ):
+            with self.subTest(name=name):
+                ids = [row['id'] for row in read_ndjson(self.path, name)]
+                self.assertEqual(
+                    ids, list(model.objects.order_by('pk').values_list(
+                        'pk', flat=True
+                    ))
+                )
+        self.assertEqual(os.listdir(self.path).count(export.MANIFEST), 0)
+
+    def test_split_into_id_ranges(self):
+        """Таблица делится на диапазоны id, по файлу на диапазон."""
+        parts = export.plan(['posts'], 3, 'ndjson', True)
+        self.assertEqual(len(parts), 3)
+        self.assertEqual(parts[0]['file'], 'posts.0.ndjson.gz')
+        self.assertEqual(
+            [part['high'] for part in parts[:-1]],
+            [part['low'] for part in parts[1:]],
+        )
+        for part in parts:
+            export.export_part(self.path, part, 'ndjson', True, 50)
+        ids = [row['id'] for row in read_ndjson(self.path, 'posts')]
+        self.assertEqual(
+            ids, sorted(Post.objects.values_list('pk', flat=True))
+        )
+
+    def test_resume_after_failure(self):
+        """После сбоя выгрузка продолжается с контрольной точки."""
+        calls = 0
+        encode = export.encode
+
+        def failing(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 3:
+                raise OSError('Диск отвалился')
+            return encode(*args, **kwargs)
+
+        with mock.patch.object(export, 'encode', failing):
+            with self.assertRaises(OSError):
+                self.export(only=['posts'])
+        with self.assertRaises(CommandError):
+            self.export(only=['posts'])
+        # Недописанный хвост отбрасывается по размеру из точки
+        with open(os.path.join(self.path, 'posts.ndjson.gz'), 'ab') as tail:
+            tail.write(b'\x1f\x8b obrezano')
+        self.export(resume=True)
+        ids = [row['id'] for row in read_ndjson(self.path, 'posts')]
+        self.assertEqual(
+            ids, sorted(Post.objects.values_list('pk', flat=True))
+        )
+
+    def test_csv_has_header(self):
+        call_command(
+            'export', self.path, format='csv', only=['follows'],
+            stdout=StringIO(),
+        )
+        with open(os.path.join(self.path, 'follows.csv')) as source:
+            rows = list(csv.reader(source))
+        self.assertEqual(rows[0], ['id', 'user_id', 'author_id'])
+        self.assertEqual(len(rows) - 1, Follow.objects.count())
@@ -78,7 +78,10 @@ class PostFormTests(TestCase):
         self.assertTrue(Post.objects.filter(
             text=form_data['text'],
             group=form_data['group'],
-            image='posts/small.gif',
+            image__startswith='posts/',
+            image__endswith='.jpg',
+            image_width=2,
+            image_height=1,
             author=self.user
         ).exists(), error1)
 
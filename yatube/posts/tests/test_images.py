@@ -0,0 +1,55 @@
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from .. import images
+
+ORIENTATION = 0x0112
+ROTATED_90 = 6
+
+
+def upload(name, size, mode='RGB', color=(200, 0, 0), fmt='JPEG', exif=None):
+    buffer = BytesIO()
+    kwargs = {'exif': exif} if exif is not None else {}
+    Image.new(mode, size, color).save(buffer, fmt, **kwargs)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def opened(file):
+    file.seek(0)
+    return Image.open(file)
+
+
+@override_settings(POST_IMAGE_MAX_DIMENSION=100)
+class NormalizeTest(SimpleTestCase):
+    def test_downsizes_and_strips_metadata(self):
+        """Большая картинка уменьшается, EXIF применяется и удаляется"""
+        exif = Image.Exif()
+        exif[ORIENTATION] = ROTATED_90
+        file, width, height = images.normalize(
+            upload('photo.jpeg', (400, 200), exif=exif.tobytes())
+        )
+        image = opened(file)
+        self.assertEqual((width, height), (50, 100))
+        self.assertEqual(image.size, (50, 100))
+        self.assertEqual(image.format, 'JPEG')
+        self.assertNotIn('exif', image.info)
+        self.assertEqual(file.name, 'photo.jpg')
+
+    def test_transparent_image_stays_png(self):
+        """Картинка с прозрачностью перекодируется в PNG"""
+        file, width, height = images.normalize(upload(
+            'logo.png', (20, 10), 'RGBA', (0, 0, 0, 0), 'PNG',
+        ))
+        self.assertEqual(opened(file).format, 'PNG')
+        self.assertEqual((width, height), (20, 10))
+        self.assertEqual(file.name, 'logo.png')
+
+    def test_opaque_png_becomes_jpeg(self):
+        """Непрозрачный PNG перекодируется в JPEG"""
+        file, _, _ = images.normalize(upload(
+            'shot.png', (20, 10), 'RGBA', (10, 10, 10, 255), 'PNG',
+        ))
+        self.assertEqual(opened(file).format, 'JPEG')
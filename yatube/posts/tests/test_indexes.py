@@ -0,0 +1,42 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_feeds_read_index_in_order(self):
+        """Ленты группы и автора идут по индексу без сортировки."""
+        feeds = (
+            ('post_group_pub_date_idx', Post.objects.filter(group=self.group)),
+            ('post_author_pub_date_idx', Post.objects.filter(
+                author=self.author
+            )),
+        )
+        for index, queryset in feeds:
+            with self.subTest(index=index):
+                plan = queryset[:10].explain()
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_explain_feeds_rolls_back_seed(self):
+        """Бенчмарк сравнивает планы и не оставляет данных."""
+        out = StringIO()
+        call_command('explain_feeds', seed=50, repeat=1, stdout=out)
+        self.assertIn('Ускорение', out.getvalue())
+        self.assertFalse(Post.objects.exists())
+        self.assertEqual(User.objects.count(), 1)
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..common import KeysetPage, decode_cursor
+from ..models import Group, Post
+
+TEST_OF_POST = 13
+SHOULD_BE = 10
+User = get_user_model()
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestName')
+        cls.group = Group.objects.create(
+            title='Test Group',
+            slug='test_group',
+        )
+        for i in range(TEST_OF_POST):
+            Post.objects.create(
+                text=f'Test text {i}',
+                group=cls.group,
+                author=cls.user,
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_cursor_walks_forward_and_back(self):
+        """Курсор ведет на следующую и обратно на предыдущую страницу"""
+        pages = (
+            reverse('posts:main_page'),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:posts_by_groups', kwargs={'slug': self.group.slug}),
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                first = self.guest_client.get(page + '?cursor=')
+                first_obj = first.context['page_obj']
+                self.assertIsInstance(first_obj, KeysetPage)
+                self.assertEqual(len(first_obj), SHOULD_BE)
+                self.assertFalse(first_obj.has_previous())
+
+                second = self.guest_client.get(
+                    f'{page}?cursor={first_obj.next_cursor}'
+                )
+                second_obj = second.context['page_obj']
+                self.assertEqual(len(second_obj), TEST_OF_POST - SHOULD_BE)
+                self.assertFalse(second_obj.has_next())
+                self.assertTrue(second_obj.has_previous())
+
+                back = self.guest_client.get(
+                    f'{page}?cursor={second_obj.previous_cursor}'
+                )
+                self.assertEqual(
+                    list(back.context['page_obj']), list(first_obj),
+                )
+
+    @override_settings(POSTS_PAGINATION='keyset')
+    def test_keyset_mode_without_count(self):
+        """В режиме keyset страница строится без COUNT(*)"""
+        self.guest_client.get(reverse('posts:main_page'))
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(reverse('posts:main_page'))
+        self.assertIsInstance(response.context['page_obj'], KeysetPage)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор отдает первую страницу"""
+        self.assertIsNone(decode_cursor('не-курсор'))
+        response = self.guest_client.get(
+            reverse('posts:main_page') + '?cursor=%%%'
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), SHOULD_BE)
+        self.assertFalse(page_obj.has_previous())
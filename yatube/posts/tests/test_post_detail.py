@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import views
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+COMMENTATORS = 5
+# Автор и группа поста для ETag, затем пост и страница комментариев:
+# каждый одним запросом
+GUEST_QUERIES = 3
+
+
+class PostDetailLoaderTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group,
+        )
+        for i in range(COMMENTATORS):
+            Comment.objects.create(
+                text=f'Комментарий {i}',
+                author=User.objects.create_user(username=f'reader{i}'),
+                post=cls.post,
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_query_budget(self):
+        """Пост с комментариями загружается без N+1"""
+        self.guest_client.get(self.url)
+        with self.assertNumQueries(GUEST_QUERIES):
+            response = self.guest_client.get(self.url)
+        content = response.content.decode()
+        for i in range(COMMENTATORS):
+            self.assertIn(f'reader{i}', content)
+        self.assertEqual(response.context['posts_count'], 1)
+        self.assertEqual(response.context['comments_count'], COMMENTATORS)
+
+    def test_comments_are_paginated_by_cursor(self):
+        """Комментарии листаются курсором"""
+        with mock.patch.object(views, 'COMMENTS_AMOUNT', 2):
+            first = self.guest_client.get(self.url).context['comments']
+            second = self.guest_client.get(
+                f'{self.url}?comments_cursor={first.next_cursor}'
+            ).context['comments']
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 2)
+        self.assertTrue(set(first).isdisjoint(second))
+        self.assertGreater(first[-1].pub_date, second[0].pub_date)
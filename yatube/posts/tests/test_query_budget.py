@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware import UNRESOLVED, query_report, reset_report
+from core.testing import get_within_budget, max_queries
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+# Постов больше, чем на странице, и у каждого свой автор и группа:
+# N+1 в шаблоне сразу выйдет за бюджет
+AUTHORS = 12
+
+
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for i in range(AUTHORS):
+            author = User.objects.create_user(username=f'author{i}')
+            Post.objects.create(
+                text=f'Пост {i}',
+                author=author,
+                group=Group.objects.create(title=f'Г{i}', slug=f'g{i}'),
+            )
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.author = author
+        cls.post = Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group,
+        )
+        for i in range(AUTHORS):
+            Comment.objects.create(
+                text=f'Комментарий {i}',
+                author=User.objects.get(username=f'author{i}'),
+                post=cls.post,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_views_within_budget(self):
+        """Страницы с холодным кешем фрагментов не выходят за бюджет"""
+        urls = (
+            reverse('posts:main_page'),
+            reverse('posts:posts_by_groups', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author0'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                # Первый запрос досчитывает ленивые счетчики в БД,
+                # бюджет проверяется на установившемся режиме
+                self.client.get(url)
+                cache.clear()
+                response = get_within_budget(self.client, url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_max_queries_fails_over_budget(self):
+        """max_queries падает, если запросов больше лимита"""
+        with self.assertRaises(AssertionError):
+            with max_queries(1):
+                list(User.objects.all())
+                list(Post.objects.all())
+
+    @override_settings(QUERY_BUDGETS={'posts:main_page': 0})
+    def test_middleware_reports_over_budget(self):
+        """Middleware пишет число запросов и отмечает превышение бюджета"""
+        reset_report()
+        with self.modify_settings(MIDDLEWARE={
+            'prepend': 'core.middleware.QueryCountMiddleware',
+        }):
+            with self.assertLogs('core.middleware', 'WARNING'):
+                response = self.client.get(reverse('posts:main_page'))
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+        report = {row['view']: row for row in query_report()}
+        self.assertEqual(report['posts:main_page']['over_budget'], 1)
+
+    def test_middleware_groups_unresolved_paths(self):
+        """Адреса без вьюхи копятся в одной строке отчета"""
+        reset_report()
+        with self.modify_settings(MIDDLEWARE={
+            'prepend': 'core.middleware.QueryCountMiddleware',
+        }):
+            for i in range(3):
+                self.client.get(f'/missing-{i}/')
+        report = {row['view']: row for row in query_report()}
+        self.assertEqual(list(report), [UNRESOLVED])
+        self.assertEqual(report[UNRESOLVED]['requests'], 3)
+
+    @override_settings(QUERY_BUDGETS={
+        **settings.QUERY_BUDGETS, 'posts:main_page': 0,
+    })
+    def test_report_command_keeps_shared_cache(self):
+        """query_report --cold не очищает общий кеш и падает CommandError"""
+        cache.set('shared', 'значение')
+        with self.assertRaises(CommandError), self.assertLogs(
+            'core.middleware', 'WARNING'
+        ):
+            call_command('query_report', cold=True, repeat=1,
+                         stdout=StringIO())
+        self.assertEqual(cache.get('shared'), 'значение')
@@ -0,0 +1,178 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.testing import commit_callbacks
+
+from .. import search
+from ..models import Comment, Post, SearchToken
+
+User = get_user_model()
+PAGE = 10
+
+
+class SearchMixin:
+    """Общие проверки для обоих движков поиска."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.rare = Post.objects.create(
+            text='Котики и собаки', author=self.author,
+        )
+        self.often = Post.objects.create(
+            text='Котики, котики, котики!', author=self.author,
+        )
+        Post.objects.create(text='Про собак', author=self.author)
+
+    def found(self, query):
+        return list(search.SearchResults(query)[:PAGE])
+
+    def test_ranked_results(self):
+        """Пост с частым словом ранжируется выше"""
+        self.assertEqual(self.found('котики'), [self.often, self.rare])
+        self.assertEqual(self.found('КОТИКИ собаки'), [self.rare])
+        self.assertEqual(self.found('единороги'), [])
+        self.assertEqual(self.found('"*'), [])
+
+    def test_index_follows_writes(self):
+        """Индекс обновляется при правке и удалении поста"""
+        self.rare.text = 'Единороги'
+        self.rare.save()
+        self.assertEqual(self.found('единороги'), [self.rare])
+        self.assertEqual(self.found('котики'), [self.often])
+        self.often.delete()
+        self.assertEqual(self.found('котики'), [])
+
+    def test_comments_are_searchable(self):
+        """Пост находится по тексту своих комментариев"""
+        comment = Comment.objects.create(
+            text='Единороги!', author=self.author, post=self.rare,
+        )
+        self.assertEqual(self.found('единороги'), [self.rare])
+        comment.delete()
+        self.assertEqual(self.found('единороги'), [])
+
+    def test_comments_indexed_incrementally(self):
+        """Новый и удаленный комментарий не пересобирают документ поста"""
+        Comment.objects.create(
+            text='Единороги', author=self.author, post=self.rare,
+        )
+        with mock.patch.object(search, 'documents') as documents:
+            comment = Comment.objects.create(
+                text='Драконы и единороги', author=self.author,
+                post=self.rare,
+            )
+            self.assertEqual(self.found('драконы единороги'), [self.rare])
+            comment.delete()
+        documents.assert_not_called()
+        self.assertEqual(self.found('драконы'), [])
+        self.assertEqual(self.found('единороги'), [self.rare])
+
+    def test_count_is_cached_until_posts_change(self):
+        """Число результатов считается один раз до изменения постов"""
+        self.assertEqual(search.SearchResults('котики').count(), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(search.SearchResults('котики').count(), 2)
+        with commit_callbacks():
+            Post.objects.create(text='Снова котики', author=self.author)
+        self.assertEqual(search.SearchResults('котики').count(), 3)
+
+    def reindex(self, **options):
+        options.setdefault('processes', 0)
+        call_command(
+            'reindex_search',
+            batch_size=1,
+            checkpoint=self.checkpoint,
+            stdout=StringIO(),
+            **options,
+        )
+
+    def test_reindex_command(self):
+        """Команда перестраивает индекс с нуля"""
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint')
+        search.get_backend().clear()
+        self.assertEqual(self.found('котики'), [])
+        self.reindex()
+        self.assertEqual(self.found('котики'), [self.often, self.rare])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_reindex_keeps_index_searchable(self):
+        """Перестройка без --resume не очищает индекс перед началом"""
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint')
+        backend = search.get_backend()
+        found = []
+
+        def write(ids, rows):
+            found.append(self.found('котики'))
+            return original(ids, rows)
+
+        original = backend.write
+        with mock.patch.object(search, 'get_backend', return_value=backend):
+            with mock.patch.object(backend, 'write', side_effect=write):
+                self.reindex()
+        self.assertEqual(found[0], [self.often, self.rare])
+        self.assertEqual(self.found('котики'), [self.often, self.rare])
+
+    def test_reindex_resumes_from_checkpoint(self):
+        """С --resume индексируются только посты после контрольной точки"""
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint')
+        search.get_backend().clear()
+        with open(self.checkpoint, 'w') as checkpoint:
+            json.dump({
+                'backend': search.get_backend().name,
+                'last_pk': self.rare.pk,
+                'indexed': 1,
+            }, checkpoint)
+        self.reindex(resume=True)
+        self.assertEqual(self.found('котики'), [self.often])
+
+    def test_view_paginates(self):
+        """Страница поиска выдает результаты постранично"""
+        for i in range(PAGE + 2):
+            Post.objects.create(text=f'Лес {i}', author=self.author)
+        response = Client().get(reverse('posts:post_search'), {'q': 'лес'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, PAGE + 2)
+        self.assertEqual(len(page_obj), PAGE)
+        self.assertContains(response, '?q=%D0%BB%D0%B5%D1%81&amp;page=2')
+
+    def test_admin_search(self):
+        """Поиск в админке идет по индексу"""
+        model_admin = admin.site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/', {'q': 'котики'})
+        queryset, use_distinct = model_admin.get_search_results(
+            request, Post.objects.all(), 'котики'
+        )
+        self.assertEqual(set(queryset), {self.often, self.rare})
+        self.assertFalse(use_distinct)
+
+
+@override_settings(SEARCH_BACKEND='fts5')
+class FTS5SearchTest(SearchMixin, TestCase):
+    def test_reindex_deletes_orphans(self):
+        """Строки удаленных в обход сигналов постов убираются из индекса"""
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint')
+        orphan = Post.objects.create(text='Котики-сироты', author=self.author)
+        Post.objects.filter(pk=orphan.pk)._raw_delete('default')
+        self.assertEqual(search.SearchResults('сироты').count(), 1)
+        self.reindex()
+        self.assertEqual(search.SearchResults('сироты').count(), 0)
+
+
+@override_settings(SEARCH_BACKEND='python')
+class InvertedIndexSearchTest(SearchMixin, TestCase):
+    def test_tokens_stored(self):
+        """Обратный индекс хранит число вхождений слова"""
+        self.assertEqual(
+            SearchToken.objects.get(post=self.often, term='котики').count, 3,
+        )
@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from .. import seed
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class SeedTest(TestCase):
+    def test_seed_creates_skewed_data(self):
+        """Генератор создает данные с перекосом по авторам и разными датами."""
+        seed.seed(users=50, groups=5, posts=500, comments=2, follows=10)
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 500)
+        self.assertTrue(Comment.objects.exists())
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        posts_by_author = list(Post.objects.values('author').annotate(
+            total=Count('pk')
+        ).order_by('-total').values_list('total', flat=True))
+        # Самый плодовитый автор пишет больше среднего в разы
+        self.assertGreater(posts_by_author[0], 3 * 500 / 50)
+        dates = Post.objects.values_list('pub_date', flat=True)
+        self.assertGreater(len(set(dates)), 400)
+
+    def test_seed_command_rebuilds_derived_data(self):
+        """Команда seed пересчитывает счетчики после bulk_create."""
+        call_command(
+            'seed', users=20, groups=2, posts=100, follows=5, processes=0,
+            stdout=StringIO(),
+        )
+        author = Post.objects.values('author').annotate(
+            total=Count('pk')
+        ).order_by('-total').first()
+        stats = UserStats.objects.get(pk=author['author'])
+        self.assertEqual(stats.posts_count, author['total'])
+
+    def test_benchmark_reports_percentiles(self):
+        """Бенчмарк выводит перцентили по каждой странице."""
+        seed.seed(users=20, groups=2, posts=100, follows=5)
+        out = StringIO()
+        call_command('benchmark_views', requests=2, stdout=out)
+        report = out.getvalue()
+        self.assertIn('p99', report)
+        for view in ('main_page', 'posts_by_groups', 'profile',
+                     'post_detail', 'follow_index'):
+            self.assertIn(f'posts:{view}', report)
@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import stats
+from ..models import (Comment, Follow, Group, GroupStats, Post, PostStats,
+                      UserStats)
+
+User = get_user_model()
+
+
+class StatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Test Group',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_counters_follow_writes(self):
+        """Счетчики меняются вместе с постами, комментариями и подписками"""
+        stats.user_stats(self.author.pk)
+        stats.user_stats(self.reader.pk)
+        stats.group_stats(self.group.pk)
+        stats.post_stats(self.post.pk)
+
+        Post.objects.create(text='Еще пост', author=self.author,
+                            group=self.group)
+        comment = Comment.objects.create(
+            text='Комментарий', author=self.reader, post=self.post,
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+        author_stats = UserStats.objects.get(pk=self.author.pk)
+        reader_stats = UserStats.objects.get(pk=self.reader.pk)
+        self.assertEqual(author_stats.posts_count, 2)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(reader_stats.following_count, 1)
+        self.assertEqual(reader_stats.comments_count, 1)
+        self.assertEqual(GroupStats.objects.get(pk=self.group.pk).posts_count,
+                         2)
+        self.assertEqual(PostStats.objects.get(pk=self.post.pk).comments_count,
+                         1)
+
+        comment.delete()
+        Follow.objects.all().delete()
+        reader_stats.refresh_from_db()
+        self.assertEqual(reader_stats.comments_count, 0)
+        self.assertEqual(reader_stats.following_count, 0)
+
+    def test_pages_without_aggregates(self):
+        """Профиль и пост отображаются без агрегирующих запросов"""
+        urls = (
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.guest_client.get(url)
+            with self.subTest(url=url):
+                self.assertEqual(response.context['posts_count'], 1)
+                for query in queries.captured_queries:
+                    self.assertNotIn('COUNT(', query['sql'])
+
+    def test_missing_row_inserted_before_counting(self):
+        """Недостающая строка вставляется до подсчета: bump() не теряется"""
+        UserStats.objects.filter(pk=self.author.pk).delete()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(stats.user_stats(self.author.pk).posts_count, 1)
+        sql = [query['sql'] for query in queries.captured_queries]
+        insert = next(
+            number for number, text in enumerate(sql)
+            if text.startswith('INSERT')
+        )
+        count = next(
+            number for number, text in enumerate(sql) if 'COUNT(' in text
+        )
+        self.assertLess(insert, count)
+        self.assertEqual(
+            UserStats.objects.get(pk=self.author.pk).posts_count, 1,
+        )
+
+    def test_rebuild_command(self):
+        """rebuild_stats находит и исправляет расхождения"""
+        stats.user_stats(self.author.pk)
+        UserStats.objects.filter(pk=self.author.pk).update(posts_count=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stats', '--verify', stdout=StringIO())
+        call_command('rebuild_stats', stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(pk=self.author.pk).posts_count, 1,
+        )
+        call_command('rebuild_stats', '--verify', stdout=StringIO())
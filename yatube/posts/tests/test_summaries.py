@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.testing import commit_callbacks
+
+from .. import bulk, summaries
+from ..models import Group, Post
+
+User = get_user_model()
+POSTS = 12
+
+
+class GroupSummaryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group,
+            )
+            for i in range(POSTS)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('posts:posts_by_groups', kwargs={'slug': 'group'})
+
+    def test_repeated_group_page_without_queries(self):
+        """Со сводкой и фрагментом в кеше группа не ищется в базе"""
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+
+    def test_new_post_updates_summary_in_place(self):
+        """Новый пост дописывается в сводку без пересборки"""
+        summary = summaries.get('group')
+        self.assertEqual(summary.posts_count, POSTS)
+        self.assertEqual(summary.top_authors, [(self.author.pk, 'author',
+                                                POSTS)])
+        with commit_callbacks():
+            post = Post.objects.create(
+                text='Свежий', author=self.other, group=self.group,
+            )
+        with self.assertNumQueries(0):
+            summary = summaries.get('group')
+        self.assertEqual(summary.latest[0][1], post.pk)
+        self.assertEqual(summary.posts_count, POSTS + 1)
+        self.assertEqual(
+            [row[1] for row in summary.top_authors], ['author', 'other']
+        )
+        page = self.client.get(self.url).context['page_obj']
+        self.assertEqual(page[0], post)
+
+    def test_bulk_posts_match_fresh_build(self):
+        """Пачка постов одного автора учитывается в лидерах один раз"""
+        summaries.get('group')
+        for author in (self.other, self.author):
+            with self.subTest(author=author.username):
+                with commit_callbacks():
+                    bulk.create_posts(author, [
+                        Post(text=f'Пачка {i}', group=self.group)
+                        for i in range(5)
+                    ])
+                self.assertEqual(
+                    summaries.get('group'), summaries.build('group'),
+                )
+
+    def test_rolled_back_post_not_in_summary(self):
+        """Откаченный пост не остается в сводке"""
+        before = summaries.get('group')
+        with commit_callbacks():
+            try:
+                with transaction.atomic():
+                    Post.objects.create(
+                        text='Откат', author=self.other, group=self.group,
+                    )
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        self.assertEqual(summaries.get('group'), before)
+        self.assertEqual(before.posts_count, POSTS)
+
+    def test_delete_and_rename_forget_summary(self):
+        """Удаление поста и смена slug сбрасывают сводку"""
+        summaries.get('group')
+        with commit_callbacks():
+            self.posts[-1].delete()
+        self.assertIsNone(cache.get(summaries.summary_key('group')))
+        self.assertEqual(summaries.get('group').posts_count, POSTS - 1)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        with commit_callbacks():
+            group.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_deeper_pages_continue_first_page(self):
+        """Вторая страница продолжает первую, собранную из сводки"""
+        newest = [post.pk for post in reversed(self.posts)]
+        first = self.client.get(self.url).context['page_obj']
+        second = self.client.get(self.url, {'page': 2}).context['page_obj']
+        self.assertEqual(first.paginator.num_pages, 2)
+        self.assertEqual(
+            [post.pk for post in first] + [post.pk for post in second],
+            newest,
+        )
+
+    @override_settings(POSTS_PAGINATION='keyset')
+    def test_keyset_cursor_from_summary(self):
+        """Курсор первой страницы из сводки ведет на поиск по индексу"""
+        first = self.client.get(self.url).context['page_obj']
+        self.assertTrue(first.has_next())
+        second = self.client.get(
+            self.url, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in second],
+            [post.pk for post in reversed(self.posts[:POSTS - 10])],
+        )
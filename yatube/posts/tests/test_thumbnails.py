@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def upload(name='image.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (40, 20), (200, 0, 0)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def thumbnail(self, post):
+        geometry, options = thumbnails.SIZES[0]
+        return thumbnails.lookup(post.image, geometry, **options)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_create_generates_thumbnails(self):
+        """Миниатюры генерируются при создании поста"""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': upload(),
+        })
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertIsNotNone(self.thumbnail(post))
+
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, self.thumbnail(post).url)
+
+    def test_missing_thumbnail_renders_placeholder(self):
+        """Пока миниатюры нет, вместо нее заглушка, а генерация в очереди"""
+        post = Post.objects.create(
+            text='Без миниатюры', author=self.user, image=upload(),
+        )
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            response = self.client.get(
+                reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            )
+        self.assertContains(response, 'bg-light')
+        schedule.assert_called_once_with(post.image.name)
+        self.assertIsNone(self.thumbnail(post))
+
+    def test_generated_thumbnail_replaces_cached_placeholder(self):
+        """После генерации лента отдает миниатюру, а не заглушку из кеша"""
+        post = Post.objects.create(
+            text='Без миниатюры', author=self.user, image=upload(),
+        )
+        url = reverse('posts:main_page')
+        with mock.patch.object(thumbnails, 'schedule'):
+            self.assertContains(self.client.get(url), 'bg-light')
+        thumbnails.generate(post.image.name)
+        self.assertContains(self.client.get(url), self.thumbnail(post).url)
+
+    def test_stored_size_reaches_sorl_and_page(self):
+        """sorl берет размеры оригинала у поста, лента — размеры миниатюры"""
+        post = Post.objects.create(
+            text='С размерами', author=self.user, image=upload(),
+            image_width=4000, image_height=2000,
+        )
+        thumbnails.generate(post.image.name)
+        source = default.kvstore.get(
+            ImageFile(post.image.name, post.image.storage)
+        )
+        self.assertEqual(source.size, [4000, 2000])
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertContains(response, 'width="960" height="339"')
+
+    @override_settings(JOBS_EAGER=True)
+    def test_failed_generation_keeps_page(self):
+        """Сбой генерации миниатюры не роняет страницу"""
+        post = Post.objects.create(
+            text='Битая картинка', author=self.user, image=upload(),
+        )
+        with mock.patch.object(
+            thumbnails, 'get_thumbnail', side_effect=OSError('битый файл')
+        ), self.assertLogs('core.jobs', 'ERROR'):
+            response = self.client.get(
+                reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            )
+        self.assertContains(response, 'bg-light')
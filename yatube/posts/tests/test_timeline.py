@@ -0,0 +1,177 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import feeds
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+@override_settings(FEED_FANOUT=True)
+class TimelineTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.old_post = Post.objects.create(
+            text='Старый пост', author=self.author,
+        )
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow_page(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        """Подписка заполняет ленту, отписка очищает ее"""
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(self.follow_page(), [self.old_post])
+
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(self.follow_page(), [])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков, но не чужие"""
+        stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(self.follow_page(), [post, self.old_post])
+        self.assertFalse(TimelineEntry.objects.filter(user=stranger))
+
+    def test_page_hydrated_in_one_query(self):
+        """Посты страницы загружаются одним запросом с автором и группой"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        for i in range(5):
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+        self.follow_page()
+        with self.assertNumQueries(5):
+            posts = self.follow_page()
+        self.assertEqual(len(posts), 6)
+
+    @override_settings(FEED_TIMELINE_LENGTH=2)
+    def test_timeline_is_trimmed(self):
+        """Лента обрезается до FEED_TIMELINE_LENGTH записей"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        for i in range(3):
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2,
+        )
+
+    @override_settings(JOBS_EAGER=False)
+    def test_queued_fan_out_expires_cached_page(self):
+        """Отработавшая задача раскладки сбрасывает закешированную ленту"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        call_command('run_worker', once=True, processes=0, stdout=StringIO())
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        # Читатель открыл ленту до того, как воркер разложил пост
+        self.assertNotIn(post, self.follow_page())
+        call_command('run_worker', once=True, processes=0, stdout=StringIO())
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response['X-Feed-Path'], feeds.PUSH)
+        self.assertContains(response, 'Новый пост')
+
+    def test_rebuild_command(self):
+        """Команда rebuild_timelines восстанавливает ленты"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.follow_page(), [self.old_post])
+
+
+@override_settings(FEED_FANOUT=True, FEED_CELEBRITY_THRESHOLD=2)
+class HybridFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.star = User.objects.create_user(username='star')
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_celebrity_posts_are_not_fanned_out(self):
+        """Посты «звезды» не раскладываются по лентам"""
+        Post.objects.create(text='Пост звезды', author=self.star)
+        Post.objects.create(text='Обычный пост', author=self.author)
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list(
+                'author__username', flat=True
+            )),
+            ['author'],
+        )
+
+    def test_feed_merges_both_paths(self):
+        """Лента сливает материализованные посты и посты «звезды»"""
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=author)
+            for i, author in enumerate(
+                [self.star, self.author] * 6
+            )
+        ]
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response['X-Feed-Path'], feeds.HYBRID)
+        self.assertEqual(
+            list(response.context['page_obj']), posts[::-1][:10],
+        )
+        response = self.reader_client.get(
+            reverse('posts:follow_index') + '?page=2'
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), posts[::-1][10:],
+        )
+        self.assertEqual(feeds.feed_metrics()[feeds.HYBRID], 2)
+
+    def test_only_celebrities_served_by_pull(self):
+        """Лента из одних «звезд» собирается при чтении"""
+        Follow.objects.filter(author=self.author).delete()
+        post = Post.objects.create(text='Пост звезды', author=self.star)
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response['X-Feed-Path'], feeds.PULL)
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+    def test_old_entries_of_celebrity_not_counted_twice(self):
+        """Записи, разложенные до перехода порога, не дублируются"""
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=author)
+            for i, author in enumerate([self.star, self.author] * 6)
+        ]
+        # Посты «звезды» попали в ленту, пока она была ниже порога
+        TimelineEntry.objects.bulk_create(
+            TimelineEntry(
+                user=self.reader,
+                post=post,
+                author=self.star,
+                pub_date=post.pub_date,
+            )
+            for post in posts if post.author == self.star
+        )
+        cache.clear()
+        url = reverse('posts:follow_index')
+        first = self.reader_client.get(url).context['page_obj']
+        second = self.reader_client.get(url + '?page=2').context['page_obj']
+        self.assertEqual(first.paginator.count, len(posts))
+        self.assertEqual(list(first) + list(second), posts[::-1])
+
+    def test_posts_fanned_out_when_celebrity_drops_below(self):
+        """Бывшая «звезда» раскладывает посты, написанные выше порога"""
+        post = Post.objects.create(text='Пост звезды', author=self.star)
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        Follow.objects.filter(user__username='fan').delete()
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response['X-Feed-Path'], feeds.PUSH)
+        self.assertIn(post, list(response.context['page_obj']))
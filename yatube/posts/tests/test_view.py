@@ -112,6 +112,19 @@ class PaginatorViewsTest(TestCase):
                 error_name2,
             )
 
+    def test_paginator_shows_pages_around_current(self):
+        """Навигация выводит номера только рядом с текущей страницей"""
+        for i in range(TEST_OF_POST, SHOULD_BE * 9):
+            Post.objects.create(text=f'Test text {i}', author=self.user)
+        response = self.guest_client.get(
+            reverse('posts:main_page') + '?page=5'
+        )
+        content = response.content.decode()
+        for number in (2, 8):
+            self.assertIn(f'page={number}">{number}</a>', content)
+        for number in (1, 9):
+            self.assertNotIn(f'page={number}">{number}</a>', content)
+
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostPagesTests(TestCase):
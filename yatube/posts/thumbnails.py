@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import jobs
+
+from . import counts, fragments
+from .models import Post
+
+# Размеры, которые запрашивают шаблоны лент и страницы поста
+SIZES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+PENDING_KEY = 'posts:thumbnail:{name}'
+PENDING_TIMEOUT = 60 * 5
+
+
+def lookup(file_, geometry, **options):
+    """Готовая миниатюра из kvstore sorl или None, без генерации.
+
+    Повторяет вычисление имени из ThumbnailBackend.get_thumbnail,
+    чтобы попасть в тот же ключ.
+    """
+    backend = default.backend
+    source = ImageFile(file_)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def image_feeds(name):
+    """Ленты, в которых выводятся посты с этой картинкой."""
+    names = set()
+    for author_id, group_id in Post.objects.filter(image=name).values_list(
+        'author_id', 'group_id'
+    ):
+        names.update((counts.ALL_FEED, counts.author_feed(author_id)))
+        if group_id:
+            names.add(counts.group_feed(group_id))
+    return sorted(names)
+
+
+def remember_size(source):
+    """Кладет в kvstore sorl размеры оригинала, сохраненные у поста.
+
+    Иначе sorl открывает оригинал, только чтобы узнать его размеры,
+    если миниатюра уже лежит в хранилище, а записи о ней нет.
+    """
+    size = Post.objects.filter(
+        image=source.name, image_width__isnull=False,
+    ).values_list('image_width', 'image_height').first()
+    if size is not None and default.kvstore.get(source) is None:
+        source.set_size(size)
+        default.kvstore.set(source)
+
+
+def generate(name):
+    """Генерирует все миниатюры картинки из шаблонов.
+
+    Закешированные фрагменты лент с заглушкой вместо миниатюры
+    после этого сбрасываются.
+    """
+    # Хранилище поля входит в ключ sorl, как и у шаблонного тега
+    source = ImageFile(name, Post._meta.get_field('image').storage)
+    remember_size(source)
+    try:
+        for geometry, options in SIZES:
+            get_thumbnail(source, geometry, **options)
+    finally:
+        cache.delete(PENDING_KEY.format(name=name))
+    fragments.bump(image_feeds(name))
+
+
+def schedule(name):
+    """Ставит генерацию миниатюр в фоновую очередь.
+
+    Повторная постановка той же картинки, пока первая не отработала,
+    пропускается.
+    """
+    if not name or not cache.add(
+        PENDING_KEY.format(name=name), True, PENDING_TIMEOUT
+    ):
+        return
+    jobs.enqueue('posts.thumbnails', name=name)
@@ -11,6 +11,8 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='posts_by_groups'),
     # Профайл пользователя
     path('profile/<str:username>/', views.profile, name='profile'),
+    # Поиск по постам
+    path('search/', views.post_search, name='post_search'),
     # Просмотр записи
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     # Создание поста
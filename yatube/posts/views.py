@@ -1,48 +1,78 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.http import urlencode
 
-from .common import paginator
+from core import replica
+
+from . import (counts, etags, feeds, fragments, search, stats, summaries,
+               thumbnails)
+from .common import cursor_paginator, paginator
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import Follow, Post
 
 AMOUNT = 10
+COMMENTS_AMOUNT = 50
+COMMENTS_CURSOR_PARAM = 'comments_cursor'
 User = get_user_model()
 
 
+@replica.read_only
+@etags.conditional(etags.index_feeds)
 def index(request):
 
     template = 'posts/index.html'
-    post_list = Post.objects.select_related()
+    post_list = Post.objects.select_related('author', 'group')
     text = 'Это главная страница проекта Yatube'
     title = 'Main page'
 
     context = {
         'text': text,
         'title': title,
-        'page_obj': paginator(request, post_list, AMOUNT),
+        'page_obj': paginator(request, post_list, AMOUNT, counts.ALL_FEED),
+        'fragment_timeout': fragments.timeout(),
+        'fragment_key': fragments.key(request, counts.ALL_FEED),
     }
     return render(request, template, context)
 
 
+@replica.read_only
+@etags.conditional(etags.group_feeds)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    group = summaries.get(slug)
+    if group is None:
+        raise Http404
+    post_list = Post.objects.filter(
+        group_id=group.id
+    ).select_related('author', 'group')
+    feed = counts.group_feed(group.id)
+    page_obj = summaries.first_page(request, group, post_list, AMOUNT)
+    if page_obj is None:
+        page_obj = paginator(request, post_list, AMOUNT, feed)
 
     context = {
         'title': 'Сообщества',
         'group': group,
-        'page_obj': paginator(request, post_list, AMOUNT),
+        'page_obj': page_obj,
+        'fragment_timeout': fragments.timeout(),
+        'fragment_key': fragments.key(request, feed),
     }
     return render(request, template, context)
 
 
+@replica.read_only
+@etags.conditional(etags.profile_feeds)
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    posts_count = post_list.count()
+    author = getattr(request, '_page_author', None)
+    if author is None:
+        author = get_object_or_404(User, username=username)
+    post_list = author.posts.select_related('author', 'group')
+    author_stats = stats.user_stats(author.pk)
     title = f'Профайл пользователя {username}'
     is_not_author = True
 
@@ -54,34 +84,67 @@ def profile(request, username):
             user=request.user
         ).exists()
     )
-    followers = author.following.all().count()
     if request.user == author:
         is_not_author = False
 
     context = {
         'is_not_author': is_not_author,
-        'followers': followers,
-        'posts_count': posts_count,
+        'followers': author_stats.followers_count,
+        'posts_count': author_stats.posts_count,
         'title': title,
-        'page_obj': paginator(request, post_list, AMOUNT),
+        'page_obj': paginator(
+            request, post_list, AMOUNT, counts.author_feed(author.pk)
+        ),
+        'fragment_timeout': fragments.timeout(),
+        'fragment_key': fragments.key(
+            request, counts.author_feed(author.pk)
+        ),
         'author': author,
         'following': following,
     }
     return render(request, template, context)
 
 
+def post_search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    results = search.SearchResults(query)
+
+    context = {
+        'title': 'Поиск',
+        'query': query,
+        'page_obj': Paginator(results, AMOUNT).get_page(
+            request.GET.get('page')
+        ),
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, template, context)
+
+
+@replica.read_only
+@etags.conditional(etags.post_feeds)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group', 'author__stats',
+                                    'stats'),
+        pk=post_id,
+    )
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
+        'posts_count': stats.joined(post.author, stats.user_stats).posts_count,
+        'comments_count': stats.joined(post, stats.post_stats).comments_count,
         'form': CommentForm(request.POST or None),
-        'comments': post.comments.select_related('post'),
+        'comments': cursor_paginator(
+            request, comments, COMMENTS_AMOUNT, COMMENTS_CURSOR_PARAM
+        ),
     }
     return render(request, template, context)
 
 
 @login_required
+@transaction.atomic
 def post_create(request):
     template = 'posts/create_post.html'
 
@@ -92,6 +155,8 @@ def post_create(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            if 'image' in form.changed_data:
+                thumbnails.schedule(post.image.name)
             return redirect('posts:profile', post.author.username)
 
         return render(request, template, {
@@ -107,6 +172,7 @@ def post_create(request):
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
 
@@ -126,6 +192,8 @@ def post_edit(request, post_id):
         if form.is_valid():
             post = form.save(commit=False)
             post.save()
+            if 'image' in form.changed_data:
+                thumbnails.schedule(post.image.name)
             return redirect('posts:post_detail', post_id)
 
         return render(request, template, {
@@ -144,6 +212,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
 
     post = get_object_or_404(Post, pk=post_id)
@@ -156,26 +225,42 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica.read_only
 @login_required
 def follow_index(request):
     template = 'posts/follow_index.html'
 
-    post_list = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author', 'group')
+    if feeds.is_enabled():
+        page_obj, feed_path = feeds.follow_page(request, AMOUNT)
+    else:
+        post_list = Post.objects.filter(
+            author__following__user=request.user
+        ).select_related('author', 'group')
+        page_obj = paginator(
+            request, post_list, AMOUNT, counts.follow_feed(request.user.pk)
+        )
+        feed_path = feeds.JOIN
+        feeds.record_path(feed_path)
     title = 'Following list'
     text = 'Your favorite authors'
 
     context = {
         'title': title,
         'text': text,
-        'page_obj': paginator(request, post_list, AMOUNT),
+        'page_obj': page_obj,
+        'fragment_timeout': fragments.timeout(),
+        'fragment_key': fragments.key(
+            request, counts.follow_feed(request.user.pk)
+        ),
     }
 
-    return render(request, template, context)
+    response = render(request, template, context)
+    response['X-Feed-Path'] = feed_path
+    return response
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
 
@@ -189,6 +274,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.db import router
+from django.utils import timezone
+
+from .models import FeedWatermark
+
+WATERMARK_KEY = 'posts:watermark:{feed}'
+
+
+def touch(names):
+    """Отмечает, что ленты изменились сейчас."""
+    names = set(names)
+    now = timezone.now()
+    FeedWatermark.objects.filter(feed__in=names).update(changed_at=now)
+    FeedWatermark.objects.bulk_create(
+        (FeedWatermark(feed=name, changed_at=now) for name in names),
+        ignore_conflicts=True,
+    )
+    cache.set_many({
+        WATERMARK_KEY.format(feed=name): now for name in names
+    }, None)
+    return now
+
+
+def create(names):
+    """Заводит отметки лентам, у которых их еще нет.
+
+    В отличие от touch() не сдвигает существующие отметки:
+    параллельный запрос мог уже завести их раньше.
+    """
+    now = timezone.now()
+    FeedWatermark.objects.bulk_create(
+        (FeedWatermark(feed=name, changed_at=now) for name in names),
+        ignore_conflicts=True,
+    )
+    return now
+
+
+def last_modified(names):
+    """Время последнего изменения любой из лент.
+
+    Читается из кеша, промахи — из таблицы основной базы: отметка
+    кешируется без срока, и старая отметка с реплики давала бы 304
+    для измененной ленты. Ленте без отметки (ее еще не меняли
+    с появления таблицы) ставится текущее время: лучше лишний раз
+    отдать страницу, чем 304 для измененной.
+    """
+    keys = {WATERMARK_KEY.format(feed=name): name for name in names}
+    found = cache.get_many(keys)
+    missing = [name for key, name in keys.items() if key not in found]
+    if missing:
+        stored = dict(FeedWatermark.objects.using(
+            router.db_for_write(FeedWatermark)
+        ).filter(feed__in=missing).values_list('feed', 'changed_at'))
+        absent = [name for name in missing if name not in stored]
+        if absent:
+            stored.update(dict.fromkeys(absent, create(absent)))
+        cache.set_many({
+            WATERMARK_KEY.format(feed=name): changed_at
+            for name, changed_at in stored.items()
+        }, None)
+        found.update(
+            (WATERMARK_KEY.format(feed=name), changed_at)
+            for name, changed_at in stored.items()
+        )
+    return max(found.values())
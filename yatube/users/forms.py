@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+
+from core import jobs
 
 User = get_user_model()
 
@@ -10,3 +12,28 @@ class CreationForm(UserCreationForm):
         model = User
 
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо для сброса пароля собирается и отправляется в фоне.
+
+    В очередь попадают только id пользователя и имена шаблонов:
+    одноразовая ссылка с токеном строится в задаче и не хранится
+    в аргументах задачи, которые видны в админке.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        jobs.enqueue(
+            'users.send_password_reset',
+            user_id=context['user'].pk,
+            subject_template_name=subject_template_name,
+            email_template_name=email_template_name,
+            html_email_template_name=html_email_template_name,
+            from_email=from_email,
+            to_email=to_email,
+            domain=context['domain'],
+            site_name=context['site_name'],
+            protocol=context['protocol'],
+        )
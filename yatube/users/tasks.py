@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.jobs import task
+
+User = get_user_model()
+
+
+@task('users.send_password_reset')
+def send_password_reset(user_id, subject_template_name, email_template_name,
+                        from_email, to_email, domain, site_name, protocol,
+                        html_email_template_name=None):
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return
+    context = {
+        'email': to_email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': protocol,
+    }
+    PasswordResetForm().send_mail(
+        subject_template_name, email_template_name, context,
+        from_email, to_email, html_email_template_name,
+    )
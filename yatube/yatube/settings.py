@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
 ]
 
 
@@ -58,8 +60,34 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
 ]
 
+# Запуск тестов: manage.py test или pytest
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+# Подсчет SQL-запросов по вьюхам: по умолчанию включен при DEBUG,
+# кроме тестов — бюджеты в них проверяет core.testing.max_queries
+QUERY_COUNT_MIDDLEWARE = os.getenv(
+    'YATUBE_QUERY_COUNT', '1' if DEBUG and not TESTING else ''
+) == '1'
+if QUERY_COUNT_MIDDLEWARE:
+    MIDDLEWARE.insert(0, 'core.middleware.QueryCountMiddleware')
+
+# Максимальное число SQL-запросов на страницу с холодным кешем
+# (включая сессию, пользователя и отметки времени лент). Сверяется
+# с колонкой «макс» manage.py benchmark_views --cold; первый просмотр
+# ленты добавляет два запроса на создание ее отметки времени
+QUERY_BUDGETS = {
+    'posts:main_page': 5,
+    # Холодная сборка сводки группы (posts.summaries) стоит четырех
+    # запросов; со сводкой в кеше страница обходится без них
+    'posts:posts_by_groups': 10,
+    'posts:profile': 10,
+    'posts:post_detail': 8,
+    'posts:follow_index': 6,
+}
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -86,13 +114,44 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Обертка core.db.backends.sqlite3: WAL, прагмы и транзакции IMMEDIATE.
+# YATUBE_SQLITE_TUNING=0 возвращает штатный бэкенд
+SQLITE_TUNING = os.getenv('YATUBE_SQLITE_TUNING', '1') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': (
+            'core.db.backends.sqlite3' if SQLITE_TUNING
+            else 'django.db.backends.sqlite3'
+        ),
+        'NAME': os.getenv(
+            'YATUBE_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        # Соединение живет между запросами, прагмы ставятся один раз
+        'CONN_MAX_AGE': int(os.getenv(
+            'YATUBE_DB_CONN_MAX_AGE', '60' if SQLITE_TUNING else '0'
+        )),
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        } if SQLITE_TUNING else {},
     }
 }
 
+# Реплика для чтения лент (core.routers.ReplicaRouter). Включается,
+# когда задан YATUBE_DB_REPLICA; в тестах это второй файл SQLite,
+# который догоняет основную базу через core.replica.sync()
+REPLICA_DATABASE = 'replica'
+REPLICA_READS = bool(os.getenv('YATUBE_DB_REPLICA'))
+DATABASES[REPLICA_DATABASE] = {
+    **DATABASES['default'],
+    'NAME': os.getenv('YATUBE_DB_REPLICA', DATABASES['default']['NAME']),
+    'TEST': {'NAME': os.path.join(BASE_DIR, 'test_replica.sqlite3')},
+}
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'pin_primary'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -144,10 +203,95 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загруженные картинки постов уменьшаются до этого размера по большей
+# стороне и перекодируются (JPEG с этим качеством или PNG)
+POST_IMAGE_MAX_DIMENSION = 1920
+POST_IMAGE_JPEG_QUALITY = 85
+
 AMOUNT_TITLE = 15
 
+# Бэкенд кеша выбирается переменной окружения YATUBE_CACHE.
+# locmem виден только своему процессу; остальные бэкенды общие
+# для всех воркеров, и инвалидация фрагментов лент видна всем.
+# MAX_ENTRIES понимают только бэкенды, которые сами вытесняют записи:
+# OPTIONS у каждого свои.
+CACHE_MAX_ENTRIES = {'MAX_ENTRIES': 10_000}
+CACHE_BACKENDS = {
+    'locmem': (
+        'django.core.cache.backends.locmem.LocMemCache',
+        '',
+        CACHE_MAX_ENTRIES,
+    ),
+    'file': (
+        'core.cache_backends.file.LockingFileBasedCache',
+        os.path.join(BASE_DIR, 'cache'),
+        CACHE_MAX_ENTRIES,
+    ),
+    'sqlite': (
+        'core.cache_backends.sqlite.SQLiteCache',
+        os.path.join(BASE_DIR, 'cache.sqlite3'),
+        CACHE_MAX_ENTRIES,
+    ),
+    'redis': (
+        'core.cache_backends.redis.RedisCache',
+        'redis://127.0.0.1:6379/0',
+        {},
+    ),
+}
+CACHE_BACKEND, CACHE_LOCATION, CACHE_OPTIONS = CACHE_BACKENDS[
+    os.getenv('YATUBE_CACHE', 'locmem')
+]
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION', CACHE_LOCATION),
+        'OPTIONS': CACHE_OPTIONS,
     }
 }
+
+# Режим пагинации лент: 'offset' (номера страниц) или 'keyset' (курсор)
+POSTS_PAGINATION = os.getenv('YATUBE_POSTS_PAGINATION', 'offset')
+
+# Счетчики постов в лентах: время жизни в кеше и порог,
+# после которого общая лента считается приблизительно
+POSTS_COUNT_TIMEOUT = 60 * 60
+POSTS_COUNT_ESTIMATE_THRESHOLD = 100_000
+
+# Сводка группы (posts.summaries): сколько свежих постов и самых
+# активных авторов в ней держать и время жизни в кеше. Постов должно
+# хватать на первую страницу с запасом на удаления.
+GROUP_SUMMARY_POSTS = 20
+GROUP_SUMMARY_TOP_AUTHORS = 5
+GROUP_SUMMARY_TIMEOUT = 60 * 60
+
+# Материализованная лента подписок (fan-out on write)
+FEED_FANOUT = os.getenv('YATUBE_FEED_FANOUT', '') == '1'
+FEED_TIMELINE_LENGTH = 1000
+FEED_FANOUT_BATCH = 500
+# Авторы с таким числом подписчиков не раскладываются по лентам,
+# а подмешиваются при чтении
+FEED_CELEBRITY_THRESHOLD = 10_000
+
+# Фоновая очередь задач (core.jobs). При JOBS_EAGER задачи выполняются
+# сразу в запросе, иначе их забирает manage.py run_worker
+JOBS_EAGER = os.getenv('YATUBE_JOBS_EAGER', '1' if DEBUG else '') == '1'
+JOBS_WORKERS = 4
+JOBS_BATCH = 20
+JOBS_MAX_ATTEMPTS = 5
+# Пауза перед повтором (удваивается с каждой попыткой), секунды
+JOBS_RETRY_DELAY = 10
+# Через сколько секунд задача упавшего воркера выдается снова
+JOBS_VISIBILITY_TIMEOUT = 5 * 60
+
+# Поиск по постам: 'fts5' (SQLite FTS5), 'python' (обратный индекс
+# в таблице SearchToken) или 'auto' — FTS5, если он доступен
+SEARCH_BACKEND = os.getenv('YATUBE_SEARCH_BACKEND', 'auto')
+
+# JSON API: размер страницы по умолчанию и предельный, строк
+# в одной пачке iterator() и в одном куске потока
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 10_000
+API_CHUNK_SIZE = 500
+# Строк NDJSON пакетной записи в одной транзакции
+API_BATCH_SIZE = 500